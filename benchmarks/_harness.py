@@ -0,0 +1,53 @@
+"""基准/浸泡测试脚本的公共工具 - 离屏加载 main.py 并采样进程资源"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+
+def base_parser(description):
+    """所有脚本共用的参数：--main 指定被测的 main.py（便于与旧版本对比）"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--main', metavar='PATH',
+                        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py'),
+                        help="被测的 main.py 路径，默认为仓库中的版本")
+    return parser
+
+
+def load_main(path):
+    """以离屏模式导入指定的 main.py，并创建 QApplication"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        path = os.path.join(path, 'main.py')
+
+    spec = importlib.util.spec_from_file_location('main', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['main'] = module
+    spec.loader.exec_module(module)
+    module.logger.setLevel('WARNING')
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    return module, app
+
+
+def rss_mb():
+    """当前进程常驻内存（MB）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except OSError:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 1024 / 1024 if sys.platform == 'darwin' else usage / 1024
+
+
+def pump(app, seconds):
+    """运行事件循环指定时长"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
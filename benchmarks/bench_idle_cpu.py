@@ -0,0 +1,53 @@
+"""空闲CPU基准 - 窗口打开但没有转录和显示任务时，测量进程CPU占用和界面线程唤醒次数
+
+示例（与旧版本对比）：
+    git show <rev>:main.py > /tmp/old/main.py
+    python benchmarks/bench_idle_cpu.py --main /tmp/old/main.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _harness import base_parser, load_main  # noqa: E402
+
+
+def main_entry():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=20, help="空闲测量时长")
+    parser.add_argument('--warmup', type=float, default=3, help="窗口启动后等待的时长")
+    args = parser.parse_args()
+
+    main, app = load_main(args.main)
+    from PyQt5.QtCore import QAbstractEventDispatcher, QTimer
+
+    window = main.UltraRealtimeSubtitleApp()
+    window.show()
+
+    # 统计事件循环的唤醒次数（每次处理事件前发出aboutToBlock/awake）
+    wakeups = [0]
+    dispatcher = QAbstractEventDispatcher.instance()
+    dispatcher.awake.connect(lambda: wakeups.__setitem__(0, wakeups[0] + 1))
+
+    results = {}
+
+    def start_measurement():
+        wakeups[0] = 0
+        results['cpu'] = time.process_time()
+        results['wall'] = time.monotonic()
+        QTimer.singleShot(int(args.seconds * 1000), finish_measurement)
+
+    def finish_measurement():
+        cpu = time.process_time() - results['cpu']
+        wall = time.monotonic() - results['wall']
+        print(f"空闲 {wall:.1f}s: CPU {cpu:.3f}s ({cpu / wall * 100:.2f}%), 事件循环唤醒 {wakeups[0] / wall:.1f} 次/秒",
+              flush=True)
+        os._exit(0)
+
+    QTimer.singleShot(int(args.warmup * 1000), start_measurement)
+    app.exec_()
+
+
+if __name__ == '__main__':
+    main_entry()
@@ -0,0 +1,77 @@
+"""打字机完成开销基准 - 多个进行中项目且每个项目都有较长积压时，测量每次完成和每帧处理的耗时
+
+示例（与旧版本对比）：
+    git show <rev>:main.py > /tmp/old/main.py
+    python benchmarks/bench_typewriter_finalize.py --main /tmp/old/main.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _harness import base_parser, load_main  # noqa: E402
+
+TEXT = "今天我们讨论一下明年的预算安排，财务部已经把初步方案发给大家了。the spring numbers came in higher. "
+
+
+def percentiles(times):
+    """返回 (p50, p95)，单位毫秒"""
+    if not times:
+        return 0.0, 0.0
+    values = sorted(t * 1000 for t in times)
+    return statistics.median(values), values[int(len(values) * 0.95)]
+
+
+def run(main, inflight, delta_chars, rounds, ticks_per_round):
+    """保持inflight个进行中项目：每个新项目收到一个delta_chars字符的长增量，每轮推进若干帧后完成最早的项目"""
+    widget = main.TypewriterDisplayWidget()
+    if hasattr(widget, 'max_inflight_items'):
+        widget.max_inflight_items = inflight
+    delta = (TEXT * (delta_chars // len(TEXT) + 1))[:delta_chars]
+
+    live = []
+    finalize_times = []
+    tick_times = []
+    for index in range(rounds + inflight):
+        item_id = f"item_{index}"
+        widget.add_typewriter_text(item_id, delta, delta, 0, len(delta))
+        live.append(item_id)
+        if len(live) < inflight:
+            continue
+
+        for _ in range(ticks_per_round):
+            start = time.perf_counter()
+            widget._process_typewriter_queue()
+            tick_times.append(time.perf_counter() - start)
+
+        item_id = live.pop(0)
+        start = time.perf_counter()
+        widget.finalize_typewriter_item(item_id, delta, delta, index % 7 == 6)
+        finalize_times.append(time.perf_counter() - start)
+
+    widget.deleteLater()
+    return finalize_times, tick_times
+
+
+def main_entry():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--inflight', type=int, nargs='+', default=[1, 10, 50], help="同时进行中的项目数")
+    parser.add_argument('--delta-chars', type=int, default=400, help="每个项目收到的增量字符数")
+    parser.add_argument('--rounds', type=int, default=300)
+    parser.add_argument('--ticks', type=int, default=3, help="每轮推进的帧数")
+    args = parser.parse_args()
+
+    main, _ = load_main(args.main)
+    print(f"{'inflight':>9} {'finalize p50 ms':>16} {'finalize p95 ms':>16} {'tick p50 ms':>12} {'tick p95 ms':>12}")
+    for inflight in args.inflight:
+        finalize_times, tick_times = run(main, inflight, args.delta_chars, args.rounds, args.ticks)
+        finalize_p50, finalize_p95 = percentiles(finalize_times)
+        tick_p50, tick_p95 = percentiles(tick_times)
+        print(f"{inflight:>9} {finalize_p50:>16.3f} {finalize_p95:>16.3f} {tick_p50:>12.3f} {tick_p95:>12.3f}",
+              flush=True)
+
+
+if __name__ == '__main__':
+    main_entry()
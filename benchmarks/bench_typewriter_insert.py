@@ -0,0 +1,83 @@
+"""打字机插入开销基准 - 测量不同文档长度下每帧追加字符和完成变色的耗时
+
+示例（与旧版本对比）：
+    git show <rev>:main.py > /tmp/old/main.py
+    python benchmarks/bench_typewriter_insert.py --main /tmp/old/main.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _harness import base_parser, load_main  # noqa: E402
+
+TEXT = "今天我们讨论一下明年的预算安排，财务部已经把初步方案发给大家了。the spring numbers came in higher. "
+
+
+def fill_document(widget, chars, paragraph_chars):
+    """用已完成段落把文档填充到约chars个字符"""
+    paragraph = (TEXT * (paragraph_chars // len(TEXT) + 1))[:paragraph_chars]
+    for index in range(chars // paragraph_chars):
+        widget.finalize_typewriter_item(f"fill_{index}", paragraph, paragraph, True)
+
+
+def run(main, doc_chars, paragraph_chars, items, delta_chars):
+    """在已有doc_chars字符的文档末尾流式显示items个项目，返回每帧和每次完成的耗时"""
+    widget = main.TypewriterDisplayWidget()
+    if hasattr(widget, 'pacer'):
+        widget.pacer.target_lag = 0.0  # 每帧显示全部已到达字符，与旧版本的每帧渲染可比
+    fill_document(widget, doc_chars, paragraph_chars)
+    live_chars = widget.document().characterCount()
+
+    tick_times = []
+    finalize_times = []
+    for index in range(items):
+        item_id = f"item_{index}"
+        text = ""
+        for position in range(0, 40, delta_chars):
+            delta = TEXT[position:position + delta_chars]
+            text += delta
+            widget.add_typewriter_text(item_id, delta, text, 0, len(delta))
+            while item_id in getattr(widget, '_pending_items', ()) or (
+                    widget.typewriter_items.get(item_id, {}).get('revealed', len(text)) < len(text)):
+                before = widget.document().characterCount()
+                start = time.perf_counter()
+                widget._process_typewriter_queue()
+                elapsed = time.perf_counter() - start
+                if widget.document().characterCount() != before:
+                    tick_times.append(elapsed)  # 只统计实际写入文档的帧
+
+        start = time.perf_counter()
+        widget.finalize_typewriter_item(item_id, text, text, index % 7 == 6)
+        finalize_times.append(time.perf_counter() - start)
+
+    widget.deleteLater()
+    return live_chars, tick_times, finalize_times
+
+
+def main_entry():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--doc-chars', type=int, nargs='+', default=[10000, 100000, 500000],
+                        help="预先填充的文档字符数")
+    parser.add_argument('--paragraph-chars', type=int, default=2000, help="填充段落长度")
+    parser.add_argument('--items', type=int, default=100, help="流式显示的项目数")
+    parser.add_argument('--delta-chars', type=int, default=4)
+    args = parser.parse_args()
+
+    main, _ = load_main(args.main)
+    print(f"{'doc chars':>10} {'live chars':>11} {'frame p50 ms':>13} {'frame p95 ms':>13}"
+          f" {'finalize p50 ms':>16} {'finalize p95 ms':>16}")
+    for doc_chars in args.doc_chars:
+        live_chars, tick_times, finalize_times = run(main, doc_chars, args.paragraph_chars, args.items,
+                                                     args.delta_chars)
+        tick_ms = sorted(t * 1000 for t in tick_times)
+        finalize_ms = sorted(t * 1000 for t in finalize_times)
+        print(f"{doc_chars:>10} {live_chars:>11} {statistics.median(tick_ms):>13.3f}"
+              f" {tick_ms[int(len(tick_ms) * 0.95)]:>13.3f} {statistics.median(finalize_ms):>16.3f}"
+              f" {finalize_ms[int(len(finalize_ms) * 0.95)]:>16.3f}", flush=True)
+
+
+if __name__ == '__main__':
+    main_entry()
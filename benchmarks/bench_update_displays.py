@@ -0,0 +1,55 @@
+"""界面周期更新基准 - 测量不同转录长度下每次 _update_displays 在界面线程上的耗时
+
+示例（与旧版本对比）：
+    git show <rev>:main.py > /tmp/old/main.py
+    python benchmarks/bench_update_displays.py --main /tmp/old/main.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _harness import base_parser, load_main, pump  # noqa: E402
+
+TEXT = "今天我们讨论一下明年的预算安排，财务部已经把初步方案发给大家了。the spring numbers came in higher. "
+
+
+def main_entry():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--doc-chars', type=int, nargs='+', default=[10000, 500000], help="转录文本字符数")
+    parser.add_argument('--paragraph-chars', type=int, default=2000, help="填充段落长度")
+    parser.add_argument('--ticks', type=int, default=200, help="每个长度测量的更新次数")
+    args = parser.parse_args()
+
+    main, app = load_main(args.main)
+    window = main.UltraRealtimeSubtitleApp()
+    window.show()
+    pump(app, 0.3)
+    display = window.typewriter_display
+    paragraph = (TEXT * (args.paragraph_chars // len(TEXT) + 1))[:args.paragraph_chars]
+
+    print(f"{'doc chars':>10} {'tick p50 ms':>12} {'tick p95 ms':>12}")
+    filled = 0
+    for doc_chars in args.doc_chars:
+        while filled < doc_chars:
+            display.finalize_typewriter_item(f"fill_{filled}", paragraph, paragraph, True)
+            filled += len(paragraph)
+        window.session_start_time = time.time() - 60
+        pump(app, 0.1)
+
+        tick_ms = []
+        for _ in range(args.ticks):
+            start = time.perf_counter()
+            window._update_displays()
+            tick_ms.append((time.perf_counter() - start) * 1000)
+        tick_ms.sort()
+        print(f"{doc_chars:>10} {statistics.median(tick_ms):>12.3f} {tick_ms[int(len(tick_ms) * 0.95)]:>12.3f}",
+              flush=True)
+
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    main_entry()
@@ -0,0 +1,144 @@
+"""浸泡测试 - 按加速速度回放合成的长时间会话轨迹，检查内存和各注册表是否保持有界
+
+示例：
+    python benchmarks/soak_replay.py --minutes 480 --speed 1200
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _harness import base_parser, load_main, pump, rss_mb  # noqa: E402
+
+PHRASES = [
+    "今天我们讨论一下明年的预算安排", "财务部已经把初步方案发给大家了", "请各位在周五之前反馈意见",
+    "the spring numbers came in higher than expected", "we will revisit the budget in April",
+    "市场部接着介绍了三个推广方案", "legal raised concerns about the trademark filings",
+    "下个季度的招聘计划需要再确认一次", "let's move on to the next item on the agenda",
+]
+
+
+def write_trace(path, minutes, seed=1, utterance_interval=5.0, drop_ratio=0.02):
+    """生成合成轨迹：每个语音段 committed + 若干 delta + completed，少量段落不发送 completed"""
+    rng = random.Random(seed)
+    events_per_minute = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        previous_id = None
+        t = 0.0
+        index = 0
+        while t < minutes * 60:
+            item_id = f"item_{index:07d}"
+            text = rng.choice(PHRASES) + rng.choice(["。", "，", ". ", ", "])
+            lines = [(t, {'type': 'input_audio_buffer.committed', 'item_id': item_id,
+                          'previous_item_id': previous_id})]
+            position = 0
+            delta_time = t + 0.3
+            while position < len(text):
+                step = rng.randint(2, 6)
+                lines.append((delta_time, {'type': 'conversation.item.input_audio_transcription.delta',
+                                           'item_id': item_id, 'delta': text[position:position + step]}))
+                position += step
+                delta_time += 0.15
+            if rng.random() >= drop_ratio:
+                final_text = text if rng.random() > 0.2 else text.upper()
+                lines.append((delta_time + 0.2, {'type': 'conversation.item.input_audio_transcription.completed',
+                                                 'item_id': item_id, 'transcript': final_text}))
+            for event_time, event in lines:
+                f.write(json.dumps({'t': round(event_time, 6), 'dir': 'in', 'event': event},
+                                   ensure_ascii=False) + '\n')
+            events_per_minute += len(lines)
+            previous_id = item_id
+            index += 1
+            t += utterance_interval
+    return events_per_minute / minutes
+
+
+def snapshot(main, window, worker, minute):
+    """采集一次资源和注册表大小"""
+    display = window.typewriter_display
+    store = worker.asr_manager.items
+    return {
+        'minute': minute,
+        'rss_mb': rss_mb(),
+        'store_items': len(store),
+        'typewriter_items': len(display.typewriter_items),
+        'display_order': len(display.display_order),
+        'blocks': display.document().blockCount(),
+        'scrollback': len(display._scrollback),
+        'metric_series': (len(main.metrics._counters) + len(main.metrics._gauges)
+                          + len(main.metrics._histograms)),
+        'profiler_handlers': len(main.ui_profiler._stats),
+    }
+
+
+def main_entry():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=480, help="模拟会话时长（分钟）")
+    parser.add_argument('--speed', type=float, default=1200, help="回放倍速")
+    parser.add_argument('--sample-every', type=float, default=60, help="采样间隔（模拟分钟）")
+    parser.add_argument('--rss-slack-mb', type=float, default=20, help="后半程允许的常驻内存增长（MB）")
+    args = parser.parse_args()
+
+    main, app = load_main(args.main)
+    trace_path = os.path.join(tempfile.mkdtemp(prefix='soak_'), 'trace.jsonl')
+    events_per_minute = write_trace(trace_path, args.minutes)
+
+    window = main.UltraRealtimeSubtitleApp()
+    window.show()
+    pump(app, 0.5)
+
+    window.start_replay(trace_path, args.speed)
+    worker = window.transcription_thread
+    worker.finished.disconnect(window._handle_replay_finished)  # 保持会话状态，只测量稳态
+    samples = [snapshot(main, window, worker, 0)]
+    next_sample = args.sample_every
+    started = time.monotonic()
+
+    while worker.isRunning():
+        pump(app, 0.05)
+        minute = worker.events_replayed / events_per_minute
+        if minute >= next_sample:
+            samples.append(snapshot(main, window, worker, round(minute, 1)))
+            next_sample += args.sample_every
+    samples.append(snapshot(main, window, worker, round(worker.events_replayed / events_per_minute, 1)))
+    elapsed = time.monotonic() - started
+
+    columns = list(samples[0])
+    print(' '.join(f"{name:>17}" for name in columns))
+    for sample in samples:
+        print(' '.join(f"{sample[name]:>17.1f}" if isinstance(sample[name], float) else f"{sample[name]:>17}"
+                       for name in columns))
+    print(f"回放 {worker.events_replayed} 个事件，用时 {elapsed:.1f}s")
+
+    # 后半程（已达到稳态）内各注册表不应增长，常驻内存增长应在允许范围内
+    display = window.typewriter_display
+    middle = samples[len(samples) // 2]
+    final = samples[-1]
+    failures = []
+    if final['store_items'] > worker.asr_manager.items.max_items:
+        failures.append(f"转录项目存储超过上限: {final['store_items']}")
+    if final['blocks'] > display.max_live_blocks + display.trim_batch_blocks:
+        failures.append(f"文档段落数超过上限: {final['blocks']}")
+    for name in ('typewriter_items', 'display_order'):
+        if final[name] > display.max_inflight_items:
+            failures.append(f"{name} 超过进行中项目上限: {final[name]}")
+    for name in ('metric_series', 'profiler_handlers'):
+        if final[name] > middle[name]:
+            failures.append(f"{name} 在后半程持续增长: {middle[name]} -> {final[name]}")
+    if final['rss_mb'] - middle['rss_mb'] > args.rss_slack_mb:
+        failures.append(f"常驻内存后半程增长 {final['rss_mb'] - middle['rss_mb']:.1f}MB")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+
+    os._exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main_entry()
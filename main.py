@@ -1,6 +1,12 @@
 import sys
+import argparse
 import pyaudio
 import wave
+import subprocess
+import shutil
+import sqlite3
+import glob
+import contextlib
 import threading
 import time
 import queue
@@ -8,19 +14,24 @@ import tempfile
 import os
 import asyncio
 import json
+import io
 import numpy as np
 import base64
+import hashlib
 import websocket
-from collections import deque
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout,
                              QHBoxLayout, QWidget, QPushButton, QTextEdit,
                              QLabel, QLineEdit, QScrollArea, QSpinBox, QCheckBox,
                              QComboBox, QSlider, QGroupBox, QTextBrowser,
                              QTabWidget, QProgressBar, QFileDialog, QMessageBox,
-                             QFrame, QSplitter, QDesktopWidget, QGridLayout)
-from PyQt5.QtCore import QThread, pyqtSignal, QTimer, Qt, QPropertyAnimation, QEasingCurve, QRect, QMutex, QMutexLocker
-from PyQt5.QtGui import QFont, QTextCursor, QColor, QPainter, QPen, QBrush, QLinearGradient, QTextCharFormat
+                             QFrame, QSplitter, QDesktopWidget, QGridLayout,
+                             QInputDialog, QShortcut)
+from PyQt5.QtCore import QCoreApplication, QObject, QEvent, QPointF, QRectF, QThread, pyqtSignal, QTimer, Qt, QPropertyAnimation, QEasingCurve, QRect, QMutex, QMutexLocker
+from PyQt5.QtGui import (QFont, QTextCursor, QColor, QPainter, QPen, QBrush, QLinearGradient, QTextCharFormat,
+                         QKeySequence, QPolygonF, QPixmap, QImage)
 import openai
 import requests
 import difflib
@@ -37,6 +48,7 @@ except ImportError:
 
 try:
     from pydub import AudioSegment
+    from pydub.utils import mediainfo
 
     HAS_PYDUB = True
 except ImportError:
@@ -61,7 +73,27 @@ class ConfigManager:
             'language': 'zh',
             'prompt': '',
             'hotwords': [],
-            'font_size': 18
+            'font_size': 18,
+            'metrics_host': '127.0.0.1',
+            'metrics_port': 9464,
+            'trace_dir': os.path.join(os.path.expanduser("~"), ".openai_asr_traces"),
+            'trace_store_audio': False,
+            'typewriter_target_lag_ms': 300,
+            'stall_threshold_ms': 100,
+            'show_spectrogram': False,
+            'file_concurrency': 4,
+            'file_max_retries': 3,
+            'file_chunk_overlap_ms': 0,
+            'file_chunk_format': 'flac',
+            'file_memory_budget_mb': 256,
+            'transcript_cache_enabled': True,
+            'transcript_cache_dir': os.path.join(os.path.expanduser("~"), ".openai_asr_cache"),
+            'transcript_cache_max_mb': 512,
+            'batch_journal_path': os.path.join(os.path.expanduser("~"), ".openai_asr_batch.sqlite3"),
+            'batch_output_dir': '',
+            'batch_max_requests': 8,
+            'batch_parallel_files': 2,
+            'file_timestamp_formats': []
         }
 
     def load_config(self):
@@ -276,6 +308,10 @@ class LanguageManager:
                 'zh': '⚙️ 设置',
                 'en': '⚙️ Settings'
             },
+            'btn_batch': {
+                'zh': '🗂 批量转录文件夹',
+                'en': '🗂 Batch Folder'
+            },
             'btn_refresh': {
                 'zh': '🔄 刷新',
                 'en': '🔄 Refresh'
@@ -352,6 +388,14 @@ class LanguageManager:
                 'zh': '启用调试模式',
                 'en': 'Enable Debug Mode'
             },
+            'checkbox_record_trace': {
+                'zh': '记录会话轨迹 (用于回放)',
+                'en': 'Record Session Trace (for replay)'
+            },
+            'checkbox_spectrogram': {
+                'zh': '频谱图',
+                'en': 'Spectrogram'
+            },
 
             # 占位符文本
             'placeholder_api_key': {
@@ -390,6 +434,24 @@ class LanguageManager:
                 'zh': '⏹️ 已停止',
                 'en': '⏹️ Stopped'
             },
+            'status_replaying': {
+                'zh': '▶️ 正在回放会话轨迹...',
+                'en': '▶️ Replaying session trace...'
+            },
+            'status_replay_finished': {
+                'zh': '✅ 会话回放完成',
+                'en': '✅ Session replay finished'
+            },
+
+            # 调试信息
+            'debug_ui_stalls': {
+                'zh': '界面卡顿',
+                'en': 'UI stalls'
+            },
+            'debug_longest': {
+                'zh': '最长',
+                'en': 'longest'
+            },
             'status_cleared': {
                 'zh': '🗑️ 已清空',
                 'en': '🗑️ Cleared'
@@ -402,6 +464,10 @@ class LanguageManager:
                 'zh': '📋 已复制到剪贴板',
                 'en': '📋 Copied'
             },
+            'status_not_found': {
+                'zh': '🔍 未找到匹配内容',
+                'en': '🔍 No match found'
+            },
             'status_device_updated': {
                 'zh': '🔄 设备已更新',
                 'en': '🔄 Device Updated'
@@ -582,6 +648,14 @@ class LanguageManager:
                 'zh': '提示',
                 'en': 'Tip'
             },
+            'dialog_search': {
+                'zh': '查找',
+                'en': 'Find'
+            },
+            'dialog_search_prompt': {
+                'zh': '在完整转录中查找：',
+                'en': 'Find in full transcript:'
+            },
             'dialog_settings': {
                 'zh': '设置',
                 'en': 'Settings'
@@ -616,6 +690,10 @@ class LanguageManager:
                 'zh': '保存转录文件',
                 'en': 'Save Transcription'
             },
+            'file_select_folder': {
+                'zh': '选择音频文件夹',
+                'en': 'Select Audio Folder'
+            },
             'file_select_audio': {
                 'zh': '选择音频文件',
                 'en': 'Select Audio File'
@@ -831,17 +909,515 @@ class SafeQueue:
             return self._queue.empty()
 
 
+class MetricsRegistry:
+    """线程安全的指标注册表 - 计数器、仪表和固定分桶直方图，输出Prometheus文本格式"""
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, prefix='asr'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+
+    def _key(self, name, labels):
+        if labels:
+            return name, tuple(sorted(labels.items()))
+        return name, ()
+
+    def describe(self, name, help_text):
+        """设置指标说明"""
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, labels=None):
+        """计数器累加"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, labels=None):
+        """设置仪表值"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, labels=None, buckets=None):
+        """记录直方图观测值"""
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                bounds = tuple(buckets or self.DEFAULT_BUCKETS)
+                hist = {'bounds': bounds, 'counts': [0] * len(bounds), 'sum': 0.0, 'count': 0}
+                self._histograms[key] = hist
+            for i, bound in enumerate(hist['bounds']):
+                if value <= bound:
+                    hist['counts'][i] += 1
+                    break
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def get(self, name, labels=None, default=0):
+        """读取计数器或仪表的当前值"""
+        key = self._key(name, labels)
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            return self._gauges.get(key, default)
+
+    def histogram_snapshot(self, name, labels=None):
+        """获取直方图快照"""
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                return None
+            return {'bounds': hist['bounds'], 'counts': list(hist['counts']),
+                    'sum': hist['sum'], 'count': hist['count']}
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _format_labels(label_items, extra=None):
+        items = list(label_items)
+        if extra:
+            items.append(extra)
+        if not items:
+            return ''
+        parts = []
+        for k, v in items:
+            v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{k}="{v}"')
+        return '{' + ','.join(parts) + '}'
+
+    def render_prometheus(self):
+        """渲染为Prometheus文本格式"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {k: {'bounds': h['bounds'], 'counts': list(h['counts']),
+                              'sum': h['sum'], 'count': h['count']}
+                          for k, h in self._histograms.items()}
+
+        lines = []
+        declared = set()
+
+        def declare(name, metric_type):
+            full_name = f"{self.prefix}_{name}"
+            if full_name not in declared:
+                declared.add(full_name)
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+            return full_name
+
+        for (name, label_items), value in sorted(counters.items()):
+            full_name = declare(name, 'counter')
+            lines.append(f"{full_name}{self._format_labels(label_items)} {value}")
+
+        for (name, label_items), value in sorted(gauges.items()):
+            full_name = declare(name, 'gauge')
+            lines.append(f"{full_name}{self._format_labels(label_items)} {value}")
+
+        for (name, label_items), hist in sorted(histograms.items()):
+            full_name = declare(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(hist['bounds'], hist['counts']):
+                cumulative += count
+                lines.append(f"{full_name}_bucket{self._format_labels(label_items, ('le', bound))} {cumulative}")
+            lines.append(f"{full_name}_bucket{self._format_labels(label_items, ('le', '+Inf'))} {hist['count']}")
+            lines.append(f"{full_name}_sum{self._format_labels(label_items)} {hist['sum']}")
+            lines.append(f"{full_name}_count{self._format_labels(label_items)} {hist['count']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHttpServer:
+    """本地HTTP指标端点 - 供Prometheus抓取"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """启动HTTP服务"""
+        if self._server:
+            return True
+
+        registry = self.registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+            self._server.daemon_threads = True
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+            logger.info(f"📈 指标端点已启动: http://{self.host}:{self.port}/metrics")
+            return True
+        except Exception as e:
+            logger.error(f"启动指标端点失败: {e}")
+            self._server = None
+            return False
+
+    def stop(self):
+        """停止HTTP服务"""
+        try:
+            if self._server:
+                self._server.shutdown()
+                self._server.server_close()
+                self._server = None
+        except Exception as e:
+            logger.error(f"停止指标端点失败: {e}")
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+metrics.describe('audio_chunks_sent_total', 'Audio chunks sent over the realtime websocket')
+metrics.describe('audio_bytes_sent_total', 'PCM bytes sent over the realtime websocket')
+metrics.describe('audio_bytes_captured_total', 'PCM bytes captured from the input device')
+metrics.describe('audio_queue_drops_total', 'Audio blocks dropped because the capture queue was full')
+metrics.describe('audio_queue_depth', 'Audio blocks waiting in the capture queue')
+metrics.describe('audio_send_failures_total', 'Failed websocket audio sends')
+metrics.describe('messages_received_total', 'Server events received, by type')
+metrics.describe('message_handle_seconds', 'Time spent handling one server event')
+metrics.describe('connection_attempts_total', 'Realtime websocket connection attempts')
+metrics.describe('connected', 'Whether the realtime websocket is connected')
+metrics.describe('transcript_chars_total', 'Characters received in transcription deltas')
+metrics.describe('transcriptions_completed_total', 'Completed transcription items')
+metrics.describe('typewriter_active_items', 'Transcript items currently being typed')
+metrics.describe('typewriter_pending_age_seconds', 'Age of the oldest received but not yet displayed character')
+metrics.describe('typewriter_display_lag_seconds', 'Display lag sampled on each typewriter frame with a backlog')
+metrics.describe('ui_handler_seconds', 'Time spent in instrumented GUI-thread handlers, by handler')
+metrics.describe('ui_stalls_total', 'GUI event loop stalls longer than the stall threshold')
+metrics.describe('ui_stall_seconds', 'Duration of GUI event loop stalls')
+metrics.describe('spectrogram_cpu_ratio', 'Fraction of one core spent computing spectrogram columns')
+metrics.describe('file_upload_bytes_total', 'Encoded chunk bytes produced for large-file uploads')
+metrics.describe('file_upload_bytes_saved_total', 'Upload bytes saved versus exporting chunks as source-format WAV')
+metrics.describe('file_stage_seconds', 'Per-chunk busy time of each large-file pipeline stage, by stage')
+metrics.describe('transcript_cache_hits_total', 'Transcription results served from the content-addressed cache, by level')
+metrics.describe('transcript_cache_misses_total', 'Transcription cache lookups that had to call the API, by level')
+
+
+class UiHandlerProfiler:
+    """界面线程耗时统计与卡顿检测
+
+    wrap()包装槽函数和帧任务，按处理函数记录耗时直方图；帧调度器运行时每帧调用beat()作为心跳。
+    看门狗线程发现界面线程被阻塞超过阈值时，采样界面线程的调用栈写入日志。
+    """
+
+    HANDLER_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+    def __init__(self, registry, stall_threshold_ms=100, recent_size=256):
+        self.registry = registry
+        self.stall_threshold = stall_threshold_ms / 1000.0
+        self.recent_size = recent_size
+        self._stats = {}
+        self._lock = threading.Lock()
+
+        self._current = None  # (处理函数名, 开始时间)
+        self._heartbeat = time.monotonic()
+        self._heartbeat_armed = False
+        self._main_thread_id = None
+
+        self._watchdog = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()  # 空闲时看门狗在此等待，不再轮询
+        self.stall_count = 0
+        self.longest_stall = 0.0
+
+    def wrap(self, name, func):
+        """包装界面线程上的处理函数，记录耗时"""
+        def wrapper(*args):
+            outer = self._current
+            start = time.perf_counter()
+            self._current = (name, time.monotonic())
+            if not self._wake_event.is_set():
+                self._wake_event.set()
+            try:
+                return func(*args)
+            finally:
+                self._current = outer
+                self._record(name, time.perf_counter() - start)
+        return wrapper
+
+    def _record(self, name, elapsed):
+        """记录一次处理耗时"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = {'count': 0, 'max': 0.0, 'recent': deque(maxlen=self.recent_size)}
+                self._stats[name] = stats
+            stats['count'] += 1
+            stats['max'] = max(stats['max'], elapsed)
+            stats['recent'].append(elapsed)
+        self.registry.observe('ui_handler_seconds', elapsed, labels={'handler': name},
+                              buckets=self.HANDLER_BUCKETS)
+
+    def beat(self):
+        """界面线程心跳"""
+        self._heartbeat = time.monotonic()
+
+    def arm(self, armed):
+        """心跳定时器启停时开关事件循环阻塞检测"""
+        self._heartbeat = time.monotonic()
+        self._heartbeat_armed = armed
+        if armed:
+            self._wake_event.set()
+
+    def handler_summary(self, limit=3):
+        """按近期p95耗时排序的处理函数统计: [(名称, p95秒, 最大秒, 次数)]"""
+        with self._lock:
+            rows = []
+            for name, stats in self._stats.items():
+                recent = sorted(stats['recent'])
+                if not recent:
+                    continue
+                p95 = recent[int(0.95 * (len(recent) - 1))]
+                rows.append((name, p95, stats['max'], stats['count']))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:limit]
+
+    def start(self):
+        """启动看门狗线程 - 必须在界面线程调用"""
+        if self._watchdog is not None:
+            return
+        self._main_thread_id = threading.get_ident()
+        self._stop_event.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="ui-stall-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """停止看门狗线程"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def _is_active(self):
+        """是否需要检测：心跳已启动或有处理函数正在执行"""
+        return self._heartbeat_armed or self._current is not None
+
+    def _blocked_for(self, now):
+        """界面线程当前已阻塞的时长及疑似原因"""
+        blocked_for = 0.0
+        culprit = None
+        current = self._current
+        if current is not None:
+            blocked_for = now - current[1]
+            culprit = current[0]
+        if self._heartbeat_armed:
+            since_beat = now - self._heartbeat
+            if since_beat > blocked_for:
+                blocked_for = since_beat
+                culprit = culprit or 'event loop'
+        return blocked_for, culprit
+
+    def _watch(self):
+        """看门狗循环"""
+        in_stall = False
+        stall_length = 0.0
+        interval = max(0.01, self.stall_threshold / 4)
+
+        while not self._stop_event.is_set():
+            if not in_stall and not self._is_active():
+                # 心跳未启动且没有处理函数在执行时界面线程不可能卡顿，等待唤醒
+                self._wake_event.clear()
+                if not self._is_active():
+                    self._wake_event.wait()
+                continue
+
+            if self._stop_event.wait(interval):
+                break
+            try:
+                blocked_for, culprit = self._blocked_for(time.monotonic())
+                if blocked_for > self.stall_threshold:
+                    stall_length = blocked_for
+                    if not in_stall:
+                        in_stall = True
+                        self.stall_count += 1
+                        self.registry.inc('ui_stalls_total')
+                        self._log_stack(blocked_for, culprit)
+                elif in_stall:
+                    in_stall = False
+                    self.longest_stall = max(self.longest_stall, stall_length)
+                    self.registry.observe('ui_stall_seconds', stall_length)
+            except Exception as e:
+                logger.error(f"卡顿检测失败: {e}")
+
+    def _log_stack(self, blocked_for, culprit):
+        """采样界面线程调用栈"""
+        frame = sys._current_frames().get(self._main_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(不可用)'
+        logger.warning(f"⚠️ 界面线程已阻塞 {blocked_for * 1000:.0f}ms ({culprit})，调用栈:\n{stack}")
+
+
+ui_profiler = UiHandlerProfiler(metrics)
+
+
+class FrameScheduler(QObject):
+    """统一帧调度器 - 用单一定时器按各任务的频率驱动周期性界面工作
+
+    任务回调返回True表示仍有工作要做，返回False后任务进入空闲，直到被wake()唤醒。
+    所有任务空闲或窗口隐藏时定时器停止，不再产生任何唤醒。wake()可在任意线程调用。
+    """
+
+    _wake_requested = pyqtSignal()
+
+    def __init__(self, parent=None, frame_interval_ms=16, profiler=None):
+        super().__init__(parent)
+        self.frame_interval_ms = frame_interval_ms
+        self.profiler = profiler  # 可选的耗时统计与卡顿检测
+        self._tasks = OrderedDict()
+        self._lock = threading.Lock()
+        self._paused = False
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_frame)
+        # 跨线程发射时自动排队到调度器所在的界面线程
+        self._wake_requested.connect(self._ensure_running)
+
+    def register(self, name, callback, interval_ms, active=False):
+        """注册周期任务"""
+        if self.profiler is not None:
+            callback = self.profiler.wrap(getattr(callback, '__qualname__', name), callback)
+        with self._lock:
+            self._tasks[name] = {
+                'callback': callback,
+                'interval': interval_ms / 1000.0,
+                'next_due': 0.0,
+                'active': active,
+                'woken': False  # 回调执行期间收到的唤醒，防止丢失
+            }
+        if active:
+            self._ensure_running()
+
+    def unregister(self, name):
+        """注销周期任务"""
+        with self._lock:
+            self._tasks.pop(name, None)
+
+    def wake(self, name):
+        """标记任务有新工作 - 线程安全，已激活的任务不会重复发信号"""
+        with self._lock:
+            task = self._tasks.get(name)
+            if task is None:
+                return
+            task['woken'] = True
+            if task['active']:
+                return
+            task['active'] = True
+        self._wake_requested.emit()
+
+    def set_paused(self, paused):
+        """暂停或恢复调度（窗口隐藏时暂停）"""
+        try:
+            self._paused = paused
+            if paused:
+                self._stop_timer()
+            else:
+                self._ensure_running()
+        except Exception as e:
+            logger.error(f"切换帧调度状态失败: {e}")
+
+    def is_idle(self):
+        """定时器是否已停止"""
+        return not self._timer.isActive()
+
+    def _ensure_running(self):
+        """有激活任务时启动定时器"""
+        if self._paused or self._timer.isActive():
+            return
+        with self._lock:
+            has_active = any(task['active'] for task in self._tasks.values())
+        if has_active:
+            self._timer.start(self.frame_interval_ms)
+            if self.profiler is not None:
+                self.profiler.arm(True)
+
+    def _stop_timer(self):
+        """停止定时器，空闲期间不做阻塞检测"""
+        self._timer.stop()
+        if self.profiler is not None:
+            self.profiler.arm(False)
+
+    def _on_frame(self):
+        """帧回调 - 运行到期任务，全部空闲时停止定时器"""
+        now = time.monotonic()
+        any_active = False
+        if self.profiler is not None:
+            self.profiler.beat()
+
+        for name, task in list(self._tasks.items()):
+            if not task['active']:
+                continue
+            if now < task['next_due']:
+                any_active = True
+                continue
+
+            task['next_due'] = now + task['interval']
+            with self._lock:
+                task['woken'] = False
+
+            try:
+                busy = task['callback']()
+            except Exception as e:
+                logger.error(f"帧任务 {name} 执行失败: {e}")
+                busy = False
+
+            with self._lock:
+                if not busy and not task['woken']:
+                    task['active'] = False
+                else:
+                    any_active = True
+
+        if not any_active:
+            self._stop_timer()
+
+
 class CompactAudioVisualizer(QWidget):
     """紧凑型音频波形可视化组件"""
 
-    def __init__(self):
+    def __init__(self, scheduler=None):
         super().__init__()
         self.setMinimumHeight(80)
         self.setMaximumHeight(100)
 
-        self.audio_buffer = deque(maxlen=600)
         self.sample_rate = 16000
+        self.window_seconds = 1.0  # 波形显示的时间跨度
         self.is_recording = False
+
+        # 预分配的float32环形缓冲区，切片写入
+        self._ring = np.zeros(int(self.sample_rate * self.window_seconds), dtype=np.float32)
+        self._write_pos = 0
+        self._filled = 0
+        self._x_cache = {}  # 列数 -> 预计算的x轴
+        self._dirty = False  # 有未绘制的新音频数据
         self._mutex = QMutex()
 
         # 优化的配色方案
@@ -855,9 +1431,9 @@ class CompactAudioVisualizer(QWidget):
         else:
             self._init_custom_paint()
 
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_display)
-        self.update_timer.start(16)  # 60fps
+        # 由帧调度器驱动，只在有新音频数据时绘制
+        self.scheduler = scheduler or FrameScheduler(self)
+        self.scheduler.register('audio_visualizer', self.update_display, 16)
 
     def _init_pyqtgraph(self):
         """初始化PyQtGraph波形显示"""
@@ -871,6 +1447,7 @@ class CompactAudioVisualizer(QWidget):
             self.plot_widget.setLabel('bottom', '时间', color='#00FF7F', size='10pt')
             self.plot_widget.showGrid(x=True, y=True, alpha=0.15)
             self.plot_widget.setYRange(-1, 1)
+            self.plot_widget.setXRange(0, self.window_seconds, padding=0)
             self.plot_widget.getAxis('left').setWidth(35)
             self.plot_widget.getAxis('bottom').setHeight(25)
 
@@ -888,9 +1465,21 @@ class CompactAudioVisualizer(QWidget):
             self._init_custom_paint()
 
     def _init_custom_paint(self):
-        """初始化自定义绘制"""
-        self.wave_points = []
-        self.max_points = 150
+        """初始化自定义绘制 - 每列一对min/max，整条波形用一次drawPolyline绘制"""
+        self.wave_points = np.zeros(0, dtype=np.float32)
+        self.pixels_per_column = 2  # 每列包络占用的像素宽度
+        self.glow_downscale = 4  # 发光层位图的缩小倍数，放大时的平滑插值即为发光效果
+
+        # 宽笔描边折线非常慢，两层都使用单像素笔
+        self.wave_pen = QPen(self.wave_color, 0)
+        self.wave_glow_pen = QPen(QColor(0, 255, 127, 110), 0)
+
+        # 复用的折线及其numpy视图: 名称 -> [QPolygonF, 坐标视图, x坐标对应的宽度]
+        self._polylines = {}
+
+        # 背景/网格位图和低分辨率发光层位图
+        self._background_cache = None
+        self._glow_cache = None
 
     def add_audio_data(self, audio_data):
         """添加音频数据 - 线程安全"""
@@ -901,35 +1490,96 @@ class CompactAudioVisualizer(QWidget):
                     if len(audio_array) > 0:
                         audio_array = audio_array.astype(np.float32) / 32768.0
                         # 更敏感的音频检测，减少噪音
-                        audio_array = np.where(np.abs(audio_array) > 0.001, audio_array, 0)
-                        self.audio_buffer.extend(audio_array)
+                        audio_array[np.abs(audio_array) <= 0.001] = 0.0
+                        self._write_ring(audio_array)
+                        self._dirty = True
+            self.scheduler.wake('audio_visualizer')
         except Exception as e:
             logger.error(f"添加音频数据失败: {e}")
 
+    def _write_ring(self, samples):
+        """写入环形缓冲区 - 最多两次切片拷贝（调用方持有锁）"""
+        capacity = len(self._ring)
+        if len(samples) >= capacity:
+            self._ring[:] = samples[-capacity:]
+            self._write_pos = 0
+            self._filled = capacity
+            return
+
+        end = self._write_pos + len(samples)
+        if end <= capacity:
+            self._ring[self._write_pos:end] = samples
+        else:
+            first = capacity - self._write_pos
+            self._ring[self._write_pos:] = samples[:first]
+            self._ring[:end - capacity] = samples[first:]
+        self._write_pos = end % capacity
+        self._filled = min(capacity, self._filled + len(samples))
+
+    def _ordered_samples(self):
+        """按时间顺序取出缓冲区样本（调用方持有锁）"""
+        if self._filled < len(self._ring):
+            return self._ring[:self._filled].copy()
+        return np.concatenate((self._ring[self._write_pos:], self._ring[:self._write_pos]))
+
+    @staticmethod
+    def _envelope(samples, columns):
+        """按列做min/max抽取，返回交错的[min0, max0, max1, min1, ...]
+
+        奇数列顺序翻转，连成折线时列间连线沿包络上下边缘走，不会斜穿波形。
+        """
+        columns = max(1, min(columns, len(samples)))
+        per_column = len(samples) // columns
+        blocks = samples[len(samples) - per_column * columns:].reshape(columns, per_column)
+        # 转置为连续内存后沿axis=0归约，比对短的axis=1直接归约快数倍
+        blocks = np.ascontiguousarray(blocks.T)
+        envelope = np.empty(columns * 2, dtype=np.float32)
+        np.min(blocks, axis=0, out=envelope[0::2])
+        np.max(blocks, axis=0, out=envelope[1::2])
+        pairs = envelope.reshape(columns, 2)
+        pairs[1::2] = pairs[1::2, ::-1]
+        return envelope
+
+    def _x_axis(self, columns):
+        """按列数缓存的x轴（每列两个点）"""
+        x = self._x_cache.get(columns)
+        if x is None:
+            x = np.repeat(np.linspace(0, self.window_seconds, columns, dtype=np.float32), 2)
+            self._x_cache = {columns: x}
+        return x
+
     def update_display(self):
-        """更新显示"""
+        """更新显示 - 返回是否绘制了新数据"""
         try:
-            if not self.is_recording or len(self.audio_buffer) == 0:
-                return
+            if not self.is_recording or not self._dirty or self._filled == 0:
+                return False
+            self._dirty = False
 
             if HAS_PYQTGRAPH:
                 self._update_pyqtgraph()
             else:
                 self._update_custom_paint()
+            return True
         except Exception as e:
             logger.error(f"更新音频显示失败: {e}")
+            return False
 
     def _update_pyqtgraph(self):
-        """更新PyQtGraph显示"""
+        """更新PyQtGraph显示 - 每个像素列一对min/max，显示整个时间窗口的包络"""
         try:
             with QMutexLocker(self._mutex):
-                if len(self.audio_buffer) > 0:
-                    data = list(self.audio_buffer)[-400:]
-                    if len(data) > 0:
-                        x = np.linspace(0, len(data) / self.sample_rate, len(data))
-                        self.wave_curve.setData(x, data)
-                        self.wave_glow.setData(x, data)
-                        self.plot_widget.setXRange(0, len(data) / self.sample_rate)
+                samples = self._ordered_samples()
+            if len(samples) == 0:
+                return
+
+            envelope = self._envelope(samples, max(1, self.plot_widget.width()))
+            x = self._x_axis(len(envelope) // 2)
+            if len(samples) < len(self._ring):
+                # 未填满时按实际时长压缩并靠右对齐，新数据总在右端
+                duration = len(samples) / self.sample_rate
+                x = x * (duration / self.window_seconds) + (self.window_seconds - duration)
+            self.wave_curve.setData(x, envelope)
+            self.wave_glow.setData(x, envelope)
         except Exception as e:
             logger.error(f"PyQtGraph更新失败: {e}")
 
@@ -937,66 +1587,121 @@ class CompactAudioVisualizer(QWidget):
         """更新自定义绘制"""
         try:
             with QMutexLocker(self._mutex):
-                if len(self.audio_buffer) > 0:
-                    recent_data = list(self.audio_buffer)[-self.max_points:]
-                    self.wave_points = recent_data
-                    self.update()
+                samples = self._ordered_samples()
+            if len(samples) > 0:
+                self.wave_points = self._envelope(samples, max(1, self.width() // self.pixels_per_column))
+                self._render_glow()
+                self.update()
         except Exception as e:
             logger.error(f"自定义绘制更新失败: {e}")
 
+    def resizeEvent(self, event):
+        """尺寸变化 - 重建缓存并按新宽度重新抽取"""
+        super().resizeEvent(event)
+        if HAS_PYQTGRAPH:
+            return
+        self._background_cache = None
+        self._glow_cache = None
+        if self.is_recording:
+            self._dirty = True
+            self.scheduler.wake('audio_visualizer')
+
+    def _background_pixmap(self):
+        """背景和网格位图（尺寸变化时重建）"""
+        if self._background_cache is None or self._background_cache.size() != self.size():
+            pixmap = QPixmap(self.size())
+            pixmap.fill(self.background_color)
+            painter = QPainter(pixmap)
+            painter.setPen(QPen(self.grid_color, 1))
+            for i in range(2):
+                y = self.height() * i
+                painter.drawLine(0, y, self.width(), y)
+            painter.end()
+            self._background_cache = pixmap
+        return self._background_cache
+
+    def _polyline(self, key, envelope, width, center_y, scale):
+        """把包络写入复用的QPolygonF - 通过共享内存的numpy视图向量化写入坐标"""
+        count = len(envelope)
+        entry = self._polylines.get(key)
+        if entry is None or len(entry[1]) != count:
+            polygon = QPolygonF()
+            polygon.fill(QPointF(), count)
+            buffer = polygon.data()
+            buffer.setsize(count * 2 * np.dtype(np.float64).itemsize)
+            entry = [polygon, np.frombuffer(buffer, dtype=np.float64).reshape(count, 2), None]
+            self._polylines[key] = entry
+
+        polygon, xy, cached_width = entry
+        if cached_width != width:
+            xy[:, 0] = np.repeat(np.linspace(0, width, count // 2), 2)
+            entry[2] = width
+
+        np.multiply(envelope, -scale, out=xy[:, 1])
+        xy[:, 1] += center_y
+        return polygon
+
+    @staticmethod
+    def _coarsen(envelope, factor):
+        """把交错的min/max包络按factor合并列"""
+        columns = len(envelope) // 2 // factor
+        if columns < 2:
+            return envelope
+        groups = envelope[len(envelope) - columns * factor * 2:].reshape(columns, factor * 2)
+        coarse = np.empty(columns * 2, dtype=np.float32)
+        coarse[0::2] = groups.min(axis=1)
+        coarse[1::2] = groups.max(axis=1)
+        pairs = coarse.reshape(columns, 2)
+        pairs[1::2] = pairs[1::2, ::-1]
+        return coarse
+
+    def _render_glow(self):
+        """在低分辨率位图上绘制发光层"""
+        width = max(1, self.width() // self.glow_downscale)
+        height = max(1, self.height() // self.glow_downscale)
+        if self._glow_cache is None or self._glow_cache.width() != width or self._glow_cache.height() != height:
+            self._glow_cache = QPixmap(width, height)
+
+        self._glow_cache.fill(Qt.transparent)
+        if len(self.wave_points) < 2:
+            return
+        glow_points = self._coarsen(self.wave_points, self.glow_downscale)
+        painter = QPainter(self._glow_cache)
+        painter.setPen(self.wave_glow_pen)
+        painter.drawPolyline(self._polyline('glow', glow_points, width, height / 2, height / 3))
+        painter.end()
+
     def paintEvent(self, event):
-        """自定义绘制事件"""
+        """自定义绘制事件 - 背景位图、放大的发光位图和一次drawPolyline"""
         if HAS_PYQTGRAPH:
             return
 
         try:
             painter = QPainter(self)
-            painter.setRenderHint(QPainter.Antialiasing)
-
-            # 背景
-            painter.fillRect(self.rect(), self.background_color)
-
-            # 网格
-            painter.setPen(QPen(self.grid_color, 1))
-            width = self.width()
-            height = self.height()
-
-            for i in range(2):
-                y = height * i
-                painter.drawLine(0, y, width, y)
+            painter.drawPixmap(0, 0, self._background_pixmap())
 
             # 波形
-            if self.wave_points and len(self.wave_points) > 1:
-                center_y = height / 2
-                scale = height / 3
+            if len(self.wave_points) > 1:
+                height = self.height()
 
                 # 发光效果
-                painter.setPen(QPen(self.wave_glow_color, 6))
-                self._draw_wave(painter, width, center_y, scale)
+                if self._glow_cache is not None:
+                    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+                    painter.drawPixmap(QRectF(self.rect()), self._glow_cache, QRectF(self._glow_cache.rect()))
 
                 # 主波形
-                painter.setPen(QPen(self.wave_color, 2))
-                self._draw_wave(painter, width, center_y, scale)
+                painter.setPen(self.wave_pen)
+                painter.drawPolyline(self._polyline('main', self.wave_points, self.width(), height / 2, height / 3))
         except Exception as e:
             logger.error(f"绘制波形失败: {e}")
 
-    def _draw_wave(self, painter, width, center_y, scale):
-        """绘制波形"""
-        try:
-            for i in range(len(self.wave_points) - 1):
-                x1 = width * i / len(self.wave_points)
-                y1 = center_y - self.wave_points[i] * scale
-                x2 = width * (i + 1) / len(self.wave_points)
-                y2 = center_y - self.wave_points[i + 1] * scale
-                painter.drawLine(int(x1), int(y1), int(x2), int(y2))
-        except Exception as e:
-            logger.error(f"绘制波形线条失败: {e}")
-
     def start_recording(self):
         """开始录音可视化"""
         self.is_recording = True
         with QMutexLocker(self._mutex):
-            self.audio_buffer.clear()
+            self._write_pos = 0
+            self._filled = 0
+            self._dirty = False
 
     def stop_recording(self):
         """停止录音可视化"""
@@ -1006,7 +1711,8 @@ class CompactAudioVisualizer(QWidget):
                 self.wave_curve.clear()
                 self.wave_glow.clear()
             else:
-                self.wave_points.clear()
+                self.wave_points = np.zeros(0, dtype=np.float32)
+                self._glow_cache = None
                 self.update()
         except Exception as e:
             logger.error(f"停止录音可视化失败: {e}")
@@ -1015,12 +1721,13 @@ class CompactAudioVisualizer(QWidget):
 class CompactVolumeIndicator(QWidget):
     """紧凑型音量指示器"""
 
-    def __init__(self):
+    def __init__(self, scheduler=None):
         super().__init__()
         self.setFixedSize(20, 80)
         self.volume_level = 0.0
         self.peak_level = 0.0
         self.peak_hold_time = 0
+        self._dirty = False  # 音量变化尚未重绘
         self._mutex = QMutex()
 
         # 配色
@@ -1030,34 +1737,44 @@ class CompactVolumeIndicator(QWidget):
         self.background_color = QColor(20, 20, 20)
         self.border_color = QColor(60, 60, 60)
 
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_peak)
-        self.update_timer.start(40)
+        # 由帧调度器驱动，峰值回落结束后停止
+        self.scheduler = scheduler or FrameScheduler(self)
+        self.scheduler.register('volume_indicator', self.update_peak, 40)
 
     def set_volume(self, level):
-        """设置音量级别 - 线程安全"""
+        """设置音量级别 - 线程安全，重绘在界面线程的帧回调中进行"""
         try:
             with QMutexLocker(self._mutex):
                 self.volume_level = max(0.0, min(1.0, level))
                 if self.volume_level > self.peak_level:
                     self.peak_level = self.volume_level
                     self.peak_hold_time = 15
-                self.update()
+                self._dirty = True
+            self.scheduler.wake('volume_indicator')
         except Exception as e:
             logger.error(f"设置音量级别失败: {e}")
 
     def update_peak(self):
-        """更新峰值显示"""
+        """更新峰值显示 - 返回是否仍在变化"""
         try:
             with QMutexLocker(self._mutex):
+                dirty = self._dirty
+                self._dirty = False
+                old_peak = self.peak_level
                 if self.peak_hold_time > 0:
                     self.peak_hold_time -= 1
                 else:
                     self.peak_level = max(0.0, self.peak_level - 0.03)
                     if self.peak_level < self.volume_level:
                         self.peak_level = self.volume_level
+                animating = self.peak_hold_time > 0 or self.peak_level != old_peak
+
+            if dirty or animating:
+                self.update()
+            return dirty or animating
         except Exception as e:
             logger.error(f"更新峰值显示失败: {e}")
+            return False
 
     def paintEvent(self, event):
         """绘制音量指示器"""
@@ -1103,6 +1820,223 @@ class CompactVolumeIndicator(QWidget):
             logger.error(f"绘制音量指示器失败: {e}")
 
 
+class SpectrumAnalyzer:
+    """滚动频谱分析器 - 在音频回调线程中用向量化STFT计算频谱列，界面线程只取结果
+
+    输入暂存区、加窗缓冲区和输出列环形缓冲区都预先分配。单核占用超过cpu_budget时
+    按2的倍数抽帧，回落后再恢复。
+    """
+
+    def __init__(self, sample_rate=16000, fft_size=512, hop_size=256, max_columns=256,
+                 floor_db=-90.0, cpu_budget=0.02):
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.hop_size = hop_size
+        self.bins = fft_size // 2 + 1
+        self.floor_db = floor_db
+        self.cpu_budget = cpu_budget  # 允许占用的单核时间比例
+        self.enabled = False
+        self.on_columns = None  # 产生新列时的回调（在音频线程中调用）
+        self.decimation = 1  # 超出预算时每N帧取1帧
+
+        self._window = np.hanning(fft_size).astype(np.float32)
+        self._ref_db = 20 * np.log10(self._window.sum() / 2)  # 满幅正弦对应0dB
+        self._staging = np.zeros(fft_size + 8192, dtype=np.float32)
+        self._staged = 0
+        self._frames = np.zeros((len(self._staging) // hop_size, fft_size), dtype=np.float32)
+
+        self._columns = np.zeros((max_columns, self.bins), dtype=np.uint8)
+        self._written = 0
+        self._read = 0
+        self._lock = threading.Lock()
+        self._reset_requested = False  # 暂存区只由音频线程修改，清空请求在下次输入时执行
+
+        self._cost = 0.0
+        self._audio_time = 0.0
+
+    def add_audio_data(self, audio_data):
+        """输入16位PCM数据 - 在音频线程调用"""
+        try:
+            if not self.enabled or not audio_data:
+                return
+            start = time.perf_counter()
+            samples = np.frombuffer(audio_data, dtype=np.int16)
+            if self._reset_requested:
+                self._reset_requested = False
+                self._staged = 0
+
+            produced = 0
+            offset = 0
+            while offset < len(samples):
+                take = min(len(samples) - offset, len(self._staging) - self._staged)
+                self._staging[self._staged:self._staged + take] = samples[offset:offset + take]
+                self._staged += take
+                offset += take
+                produced += self._process_staged()
+
+            self._account(time.perf_counter() - start, len(samples) / self.sample_rate)
+            if produced and self.on_columns:
+                self.on_columns()
+        except Exception as e:
+            logger.error(f"频谱分析失败: {e}")
+
+    def _process_staged(self):
+        """对暂存区中所有完整帧做一次批量FFT"""
+        if self._staged < self.fft_size:
+            return 0
+
+        frame_count = (self._staged - self.fft_size) // self.hop_size + 1
+        consumed = frame_count * self.hop_size
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self._staging[:self._staged], self.fft_size)[::self.hop_size][:frame_count:self.decimation]
+
+        windowed = self._frames[:len(frames)]
+        np.multiply(frames, self._window, out=windowed)
+        # 16位整数样本，换算到满幅为1
+        spectrum = np.abs(np.fft.rfft(windowed, axis=1)) * (1.0 / 32768.0)
+        levels = 20 * np.log10(spectrum + 1e-9) - self._ref_db
+        levels = np.clip((levels - self.floor_db) * (255.0 / -self.floor_db), 0, 255).astype(np.uint8)
+        self._store(levels)
+
+        remaining = self._staged - consumed
+        self._staging[:remaining] = self._staging[consumed:self._staged]
+        self._staged = remaining
+        return len(levels)
+
+    def _store(self, levels):
+        """写入输出列环形缓冲区，一次超过容量时只保留最新的capacity列"""
+        capacity = len(self._columns)
+        with self._lock:
+            if len(levels) > capacity:
+                self._written += len(levels) - capacity
+                levels = levels[-capacity:]
+            indices = (self._written + np.arange(len(levels))) % capacity
+            self._columns[indices] = levels
+            self._written += len(levels)
+
+    def take_columns(self):
+        """取出自上次以来的新列（按时间顺序），来不及显示的旧列被丢弃"""
+        capacity = len(self._columns)
+        with self._lock:
+            available = self._written - self._read
+            if available <= 0:
+                return self._columns[:0]
+            available = min(available, capacity)
+            indices = (self._written - available + np.arange(available)) % capacity
+            self._read = self._written
+            return self._columns[indices]
+
+    def _account(self, cost, audio_seconds):
+        """按每秒音频统计计算开销，超出预算时加大抽帧"""
+        self._cost += cost
+        self._audio_time += audio_seconds
+        if self._audio_time < 1.0:
+            return
+        ratio = self._cost / self._audio_time
+        if ratio > self.cpu_budget and self.decimation < 8:
+            self.decimation *= 2
+        elif ratio < self.cpu_budget / 4 and self.decimation > 1:
+            self.decimation //= 2
+        metrics.set_gauge('spectrogram_cpu_ratio', ratio)
+        self._cost = 0.0
+        self._audio_time = 0.0
+
+    def reset(self):
+        """清空暂存和未取出的列 - 在界面线程调用，暂存区交给音频线程在下次输入时清空"""
+        with self._lock:
+            self._reset_requested = True
+            self._read = self._written
+
+
+class SpectrogramWidget(QWidget):
+    """滚动频谱图 - 按列更新的索引色QImage，颜色由查找表决定"""
+
+    def __init__(self, scheduler=None, history_columns=512):
+        super().__init__()
+        self.setMinimumHeight(60)
+        self.setMaximumHeight(90)
+
+        self.analyzer = SpectrumAnalyzer()
+        bins = self.analyzer.bins
+
+        # 8位索引图像，每个频谱列直接写入像素内存
+        self._image = QImage(history_columns, bins, QImage.Format_Indexed8)
+        self._image.setColorTable(self._build_lut())
+        self._image.fill(0)
+        buffer = self._image.bits()
+        buffer.setsize(self._image.byteCount())
+        self._pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(bins, self._image.bytesPerLine())
+        self._write_x = 0
+
+        # 约30fps取新列，没有新列时空闲
+        self.scheduler = scheduler or FrameScheduler(self)
+        self.scheduler.register('spectrogram', self.update_columns, 33)
+        self.analyzer.on_columns = lambda: self.scheduler.wake('spectrogram')
+
+    @staticmethod
+    def _build_lut():
+        """由若干控制点插值生成256色查找表（暗色到亮黄）"""
+        stops = np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+        colors = np.array([(15, 15, 15), (40, 10, 90), (180, 30, 90), (250, 140, 30), (255, 255, 180)])
+        positions = np.linspace(0.0, 1.0, 256)
+        channels = [np.interp(positions, stops, colors[:, i]).astype(np.uint32) for i in range(3)]
+        table = 0xFF000000 | (channels[0] << 16) | (channels[1] << 8) | channels[2]
+        return [int(value) for value in table]
+
+    def update_columns(self):
+        """把分析器产生的新列写入图像 - 返回是否有更新"""
+        try:
+            columns = self.analyzer.take_columns()
+            if len(columns) == 0:
+                return False
+
+            width = self._image.width()
+            columns = columns[-width:]
+            indices = (self._write_x + np.arange(len(columns))) % width
+            # 低频在下方
+            self._pixels[:, indices] = columns[:, ::-1].T
+            self._write_x = (self._write_x + len(columns)) % width
+            self.update()
+            return True
+        except Exception as e:
+            logger.error(f"更新频谱图失败: {e}")
+            return False
+
+    def clear(self):
+        """清空频谱图"""
+        self.analyzer.reset()
+        self._pixels[:] = 0
+        self._write_x = 0
+        self.update()
+
+    def showEvent(self, event):
+        """显示时才进行频谱分析"""
+        super().showEvent(event)
+        self.analyzer.enabled = True
+
+    def hideEvent(self, event):
+        """隐藏时停止频谱分析"""
+        super().hideEvent(event)
+        self.analyzer.enabled = False
+
+    def paintEvent(self, event):
+        """绘制 - 环形图像分两段缩放绘制，最新的列在右端"""
+        try:
+            painter = QPainter(self)
+            width = self._image.width()
+            height = self._image.height()
+            scale = self.width() / width
+            older = width - self._write_x
+
+            painter.drawImage(QRectF(0, 0, older * scale, self.height()), self._image,
+                              QRectF(self._write_x, 0, older, height))
+            if self._write_x:
+                painter.drawImage(QRectF(older * scale, 0, self._write_x * scale, self.height()), self._image,
+                                  QRectF(0, 0, self._write_x, height))
+        except Exception as e:
+            logger.error(f"绘制频谱图失败: {e}")
+
+
 class NetworkMonitor(QThread):
     """网络状态监控器"""
 
@@ -1133,49 +2067,798 @@ class NetworkMonitor(QThread):
         self.running = False
 
 
+def find_ffmpeg():
+    """返回可用的ffmpeg路径（沿用pydub的配置），不可用时返回None"""
+    if not HAS_PYDUB:
+        return None
+    return shutil.which(AudioSegment.converter)
+
+
+class PcmStreamReader:
+    """PCM流式读取 - 通过ffmpeg管道解码并转换到目标采样率/声道数
+
+    没有ffmpeg时只支持16位WAV，直接增量读取，可以混缩为单声道但保持原采样率。
+    """
+
+    def __init__(self, file_path, sample_rate=None, channels=None):
+        self.file_path = file_path
+        self.wav = None
+        self.process = None
+
+        try:
+            wav = wave.open(file_path, 'rb')
+        except (wave.Error, EOFError):
+            wav = None
+        if wav is not None and wav.getsampwidth() != 2:
+            wav.close()
+            wav = None
+
+        if wav is not None:
+            self.source_rate = wav.getframerate()
+            self.source_channels = wav.getnchannels()
+            self.duration_ms = wav.getnframes() * 1000 // self.source_rate
+        else:
+            if not HAS_PYDUB:
+                raise ImportError("需要安装pydub: pip install pydub")
+            info = mediainfo(file_path)
+            self.source_rate = int(info.get('sample_rate') or 44100)
+            self.source_channels = int(info.get('channels') or 2)
+            self.duration_ms = int(float(info['duration']) * 1000)
+
+        self.sample_rate = sample_rate or self.source_rate
+        self.channels = channels or self.source_channels
+
+        converter = find_ffmpeg()
+        if wav is not None and (converter is None or (self.sample_rate == self.source_rate
+                                                      and self.channels in (1, self.source_channels))):
+            # 直接读取WAV，只做混缩
+            self.wav = wav
+            self.sample_rate = self.source_rate
+            if self.channels != 1:
+                self.channels = self.source_channels
+            return
+        if wav is not None:
+            wav.close()
+        if converter is None:
+            raise RuntimeError("未找到ffmpeg，无法解码该格式")
+
+        self.process = subprocess.Popen(
+            [converter, '-v', 'error', '-i', file_path,
+             '-f', 's16le', '-acodec', 'pcm_s16le',
+             '-ar', str(self.sample_rate), '-ac', str(self.channels), '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def read(self, frames):
+        """读取最多frames帧，返回(帧数, 声道数)的int16数组，结束时返回空数组"""
+        if self.wav is not None:
+            data = self.wav.readframes(frames)
+            source_channels = self.source_channels
+        else:
+            data = self.process.stdout.read(frames * self.channels * 2)
+            if not data and self.process.wait() != 0:
+                raise RuntimeError(f"ffmpeg解码失败，返回码 {self.process.returncode}")
+            source_channels = self.channels
+
+        usable = len(data) - len(data) % (source_channels * 2)
+        samples = np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, source_channels)
+        if source_channels != self.channels:
+            samples = samples.mean(axis=1, dtype=np.float32).astype(np.int16).reshape(-1, 1)
+        return samples
+
+    def close(self):
+        try:
+            if self.wav is not None:
+                self.wav.close()
+            if self.process is not None:
+                self.process.stdout.close()
+                if self.process.poll() is None:
+                    self.process.kill()
+                self.process.wait()
+        except Exception as e:
+            logger.error(f"关闭音频流失败: {e}")
+
+
+class ChunkBufferPool:
+    """分段内存预算 - 已编码分段优先留在内存，总量超过预算时溢出到临时文件"""
+
+    def __init__(self, budget_bytes=256 * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.spilled_count = 0
+        self._lock = threading.Lock()
+
+    def store(self, name, buffer):
+        """接收编码完成的BytesIO，返回AudioChunk，超出预算时写入临时文件并释放内存"""
+        size = buffer.getbuffer().nbytes
+        with self._lock:
+            in_memory = self.used_bytes + size <= self.budget_bytes
+            if in_memory:
+                self.used_bytes += size
+            else:
+                self.spilled_count += 1
+
+        if in_memory:
+            return AudioChunk(name, buffer, size, self)
+
+        # TemporaryFile没有文件名，关闭后由系统回收，不会残留
+        spill_file = tempfile.TemporaryFile()
+        spill_file.write(buffer.getbuffer())
+        buffer.close()
+        return AudioChunk(name, spill_file, size, None)
+
+    def release(self, size):
+        with self._lock:
+            self.used_bytes -= size
+
+
+class AudioChunk:
+    """待上传的音频分段 - 数据在内存(BytesIO)、溢出的临时文件或原始文件中"""
+
+    def __init__(self, name, data, size, pool=None, owned=True):
+        self.name = name
+        self.size = size
+        self.start_ms = 0  # 分段在原始音频中的起始时间（含重叠部分）
+        self._data = data
+        self._pool = pool
+        self._owned = owned  # 原始文件不属于分段，不关闭
+
+    @classmethod
+    def from_path(cls, file_path):
+        """未分割的原始文件，直接上传"""
+        return cls(os.path.basename(file_path), file_path, os.path.getsize(file_path), owned=False)
+
+    def upload_file(self):
+        """返回(文件名, 文件对象)，可直接作为HTTP客户端的file参数，每次调用都从头读取"""
+        if isinstance(self._data, str):
+            with open(self._data, 'rb') as source:
+                return self.name, source.read()
+        self._data.seek(0)
+        return self.name, self._data
+
+    def sha256(self):
+        """分段内容的SHA-256，分块读取，不会把文件整个读入内存"""
+        if isinstance(self._data, str):
+            return TranscriptCache.file_digest(self._data)
+        if isinstance(self._data, io.BytesIO):
+            with self._data.getbuffer() as view:
+                return hashlib.sha256(view).hexdigest()
+        digest = hashlib.sha256()
+        self._data.seek(0)
+        for block in iter(lambda: self._data.read(TranscriptCache.HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+        return digest.hexdigest()
+
+    def release(self):
+        """释放内存或关闭临时文件，可重复调用"""
+        data, self._data = self._data, None
+        if data is None or not self._owned:
+            return
+        data.close()
+        if self._pool is not None:
+            self._pool.release(self.size)
+
+
+class ChunkEncoder:
+    """分段编码器 - PCM通过管道送入ffmpeg编码，编码结果直接收集到内存，wav格式由wave模块写入"""
+
+    def __init__(self, name_base, chunk_format, sample_rate, channels):
+        self.process = None
+        self.wav = None
+        self.buffer = io.BytesIO()
+        self.name = name_base + '.' + AudioFileSplitter.CHUNK_FORMATS[chunk_format]['extension']
+
+        if chunk_format == 'wav':
+            self.wav = wave.open(self.buffer, 'wb')
+            self.wav.setnchannels(channels)
+            self.wav.setsampwidth(2)
+            self.wav.setframerate(sample_rate)
+            return
+
+        self.process = subprocess.Popen(
+            [find_ffmpeg(), '-v', 'error', '-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels),
+             '-i', '-'] + AudioFileSplitter.CHUNK_FORMATS[chunk_format]['codec_args'] +
+            ['-f', chunk_format, 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # 输出必须并行读取，否则管道写满后ffmpeg和写入端互相等待
+        self._drain_thread = threading.Thread(target=self._drain, daemon=True)
+        self._drain_thread.start()
+
+    def _drain(self):
+        try:
+            for data in iter(lambda: self.process.stdout.read(65536), b''):
+                self.buffer.write(data)
+        except (OSError, ValueError):
+            pass
+
+    def write(self, samples):
+        if self.wav is not None:
+            self.wav.writeframes(samples.tobytes())
+        else:
+            self.process.stdin.write(samples.tobytes())
+
+    def close(self):
+        """结束编码，返回包含完整分段的BytesIO"""
+        if self.wav is not None:
+            self.wav.close()  # 只补写WAV头，不会关闭传入的BytesIO
+        else:
+            self.process.stdin.close()
+            self._drain_thread.join()
+            self.process.stdout.close()
+            if self.process.wait() != 0:
+                raise RuntimeError(f"分段编码失败，ffmpeg返回码 {self.process.returncode}")
+        return self.buffer
+
+    def abort(self):
+        """中途停止，丢弃未写完的分段"""
+        try:
+            if self.process is not None:
+                self.process.kill()
+                self.process.wait()
+                self._drain_thread.join()
+            self.buffer.close()
+        except Exception as e:
+            logger.error(f"清理分段失败: {e}")
+
+
 class AudioFileSplitter:
-    """音频文件分割器"""
+    """音频文件分割器 - 在目标边界附近能量最低的停顿处切分"""
+
+    ENERGY_FRAME_MS = 10  # 能量包络的帧长
+    SMOOTH_FRAMES = 5  # 平滑窗口，偏好持续的停顿而不是单个安静帧
+    ENERGY_BLOCK_FRAMES = 1 << 16  # 分块计算，限制临时float数组大小
+    STREAM_WINDOW_MS = 10000  # 流式解码每次读取的时长
+
+    # 上传分段统一转为16kHz单声道，转录模型内部也是这个采样率
+    CHUNK_SAMPLE_RATE = 16000
+    CHUNK_CHANNELS = 1
+
+    # 分段编码格式及其大小上界：每秒字节数 = PCM字节率 * pcm_ratio + bitrate / 8，另加固定的容器开销
+    CHUNK_FORMATS = {
+        # FLAC最坏情况退化为原样存储，帧头开销远小于2%
+        'flac': {'extension': 'flac', 'codec_args': ['-c:a', 'flac'],
+                 'pcm_ratio': 1.02, 'bitrate': 0, 'overhead': 8192},
+        # 固定码率MP3，大小只取决于时长
+        'mp3': {'extension': 'mp3', 'codec_args': ['-c:a', 'libmp3lame', '-b:a', '64k'],
+                'pcm_ratio': 0, 'bitrate': 64000 * 1.01, 'overhead': 65536},
+        'wav': {'extension': 'wav', 'codec_args': [],
+                'pcm_ratio': 1.0, 'bitrate': 0, 'overhead': 44},
+    }
 
     @staticmethod
-    def split_audio_file(file_path, max_size_mb=25):
-        """分割音频文件"""
-        if not HAS_PYDUB:
-            raise ImportError("需要安装pydub: pip install pydub")
+    def max_chunk_ms(chunk_format, sample_rate, channels, max_bytes):
+        """按编码格式的大小上界计算保证不超过max_bytes的最大分段时长"""
+        spec = AudioFileSplitter.CHUNK_FORMATS[chunk_format]
+        bytes_per_second = sample_rate * channels * 2 * spec['pcm_ratio'] + spec['bitrate'] / 8
+        return int((max_bytes - spec['overhead']) * 1000 / bytes_per_second)
 
-        try:
-            file_size = os.path.getsize(file_path) / (1024 * 1024)  # MB
-            if file_size <= max_size_mb:
-                return [file_path]
+    @staticmethod
+    def energy_envelope(samples, frame_len):
+        """短时能量包络 - 每帧样本平方和（交错多声道直接按帧合并）"""
+        frame_count = len(samples) // frame_len
+        energy = np.empty(frame_count, dtype=np.float64)
+        block = AudioFileSplitter.ENERGY_BLOCK_FRAMES
+        for start in range(0, frame_count, block):
+            stop = min(frame_count, start + block)
+            frames = samples[start * frame_len:stop * frame_len].reshape(stop - start, frame_len)
+            frames = frames.astype(np.float32)
+            energy[start:stop] = np.einsum('ij,ij->i', frames, frames)
+        return energy
 
-            # 加载音频文件
-            audio = AudioSegment.from_file(file_path)
+    @staticmethod
+    def quietest_frame(samples, frame_len):
+        """返回平滑能量最低的帧序号，偏好持续的停顿而不是单个安静帧"""
+        energy = AudioFileSplitter.energy_envelope(samples, frame_len)
+        if len(energy) == 0:
+            return 0
+        width = AudioFileSplitter.SMOOTH_FRAMES
+        smoothed = np.convolve(energy, np.full(width, 1.0 / width), mode='same')
+        return int(np.argmin(smoothed))
 
-            # 计算需要分割的段数
-            duration_ms = len(audio)
-            split_duration_ms = int((duration_ms * max_size_mb) / file_size)
+    @staticmethod
+    def fit_chunk(chunk, chunk_format, sample_rate, channels, max_bytes, overlap_frames, buffer_pool):
+        """分段超过大小限制时解码，在中间三分之一内的停顿处一分为二重新编码，直到每段都不超过限制
 
-            # 分割文件
-            chunks = []
-            chunk_files = []
+        大小上界按最坏情况估算，一般不会超出，这里保证超出时也不会上传过大的分段。
+        后半段同样向前包含overlap_frames，与其他分段的重叠方式一致。返回AudioChunk列表。
+        """
+        if chunk.size <= max_bytes:
+            return [chunk]
+        converter = find_ffmpeg()
+        if chunk_format == 'wav' or converter is None:
+            # WAV大小与时长严格对应，按上界计算的时长不会超出
+            logger.warning(f"分段 {chunk.name} 大小 {chunk.size} 超过限制 {max_bytes}")
+            return [chunk]
+
+        _, data = chunk.upload_file()
+        encoded = data if isinstance(data, bytes) else data.read()
+        decoded = subprocess.run(
+            [converter, '-v', 'error', '-i', '-', '-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels), '-'],
+            input=encoded, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+        del encoded
+        samples = np.frombuffer(decoded, dtype=np.int16).reshape(-1, channels)
+        if len(samples) <= 2 * overlap_frames + sample_rate:
+            logger.warning(f"分段 {chunk.name} 大小 {chunk.size} 超过限制 {max_bytes}，时长过短无法再分")
+            return [chunk]
+
+        logger.info(f"分段 {chunk.name} 大小 {chunk.size} 超过限制 {max_bytes}，一分为二重新编码")
+        start_ms = chunk.start_ms
+        name_base = os.path.splitext(chunk.name)[0]
+        chunk.release()
+
+        energy_frames = max(1, sample_rate * AudioFileSplitter.ENERGY_FRAME_MS // 1000)
+        lo, hi = len(samples) // 3, len(samples) * 2 // 3
+        cut = lo + AudioFileSplitter.quietest_frame(samples[lo:hi].reshape(-1), energy_frames * channels) * energy_frames
+
+        parts = []
+        halves = (('a', 0), ('b', cut - overlap_frames))
+        for suffix, offset in halves:
+            part = samples[:cut] if suffix == 'a' else samples[offset:]
+            encoder = ChunkEncoder(f"{name_base}{suffix}", chunk_format, sample_rate, channels)
+            try:
+                encoder.write(part)
+                half = buffer_pool.store(encoder.name, encoder.close())
+            except Exception:
+                encoder.abort()
+                raise
+            half.start_ms = start_ms + offset * 1000 // sample_rate
+            parts.extend(AudioFileSplitter.fit_chunk(half, chunk_format, sample_rate, channels, max_bytes,
+                                                     overlap_frames, buffer_pool))
+        return parts
 
-            for i in range(0, duration_ms, split_duration_ms):
-                chunk = audio[i:i + split_duration_ms]
-                chunks.append(chunk)
+    @staticmethod
+    def iter_audio_chunks(file_path, max_size_mb=25, overlap_ms=0, chunk_format='flac', stats=None,
+                          buffer_pool=None):
+        """流式分割音频文件，每生成一段就产出一个AudioChunk
+
+        按窗口解码，只在内存中保留切分搜索区和重叠部分，其余样本直接送入分段编码器，
+        内存占用与文件时长无关。分段转为16kHz单声道后按chunk_format编码，
+        时长由编码格式的大小上界决定，个别分段仍超出时由fit_chunk再分，保证每段不超过max_size_mb。
+        每段在目标边界之前的搜索区内能量最低处切分，
+        overlap_ms大于0时每段向前多包含这段时长，与上一段重叠（计入大小限制）。
+        stats不为None时写入source_pcm_bytes（按原格式导出WAV的大小）、encoded_bytes
+        和按时长估算的分段数estimated_chunks（产出第一段之前写入）。
+        分段编码在内存中完成，由buffer_pool决定留在内存还是溢出到临时文件，
+        使用方上传后需调用AudioChunk.release()。
+        """
+        file_size = os.path.getsize(file_path)
+        max_bytes = max_size_mb * 1024 * 1024
+        if file_size <= max_bytes:
+            yield AudioChunk.from_path(file_path)
+            return
 
-            # 保存分割文件
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            temp_dir = tempfile.mkdtemp()
+        if buffer_pool is None:
+            buffer_pool = ChunkBufferPool()
 
-            for i, chunk in enumerate(chunks):
-                chunk_file = os.path.join(temp_dir, f"{base_name}_part_{i + 1}.wav")
-                chunk.export(chunk_file, format="wav")
-                chunk_files.append(chunk_file)
+        if find_ffmpeg() is None:
+            chunk_format = 'wav'
+        stream = PcmStreamReader(file_path, AudioFileSplitter.CHUNK_SAMPLE_RATE, AudioFileSplitter.CHUNK_CHANNELS)
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        encoder = None
+        try:
+            rate, channels = stream.sample_rate, stream.channels
+            if stats is not None:
+                stats['source_pcm_bytes'] = stream.duration_ms * stream.source_rate * stream.source_channels * 2 // 1000
+                stats['encoded_bytes'] = 0
+
+            limit_ms = AudioFileSplitter.max_chunk_ms(chunk_format, rate, channels, max_bytes)
+            if overlap_ms * 2 > limit_ms:
+                # 重叠计入大小限制，过长时每段前进的时长太短甚至为负
+                raise ValueError(f"分块重叠 {overlap_ms}ms 超过分段时长上限 {limit_ms}ms 的一半，请减小重叠或增大分段大小")
+            search_ms = min(30000, (limit_ms - overlap_ms) // 5)
+            if stats is not None:
+                # 按每段最短的情况（在搜索区开头切分）估算，进度不会因分段数超出估算而回退
+                step_ms = max(1, limit_ms - overlap_ms - search_ms)
+                stats['estimated_chunks'] = max(1, -(-max(0, stream.duration_ms - overlap_ms) // step_ms))
+
+            max_frames = limit_ms * rate // 1000
+            search_frames = max(1, search_ms * rate // 1000)
+            overlap_frames = overlap_ms * rate // 1000
+            energy_frames = max(1, rate * AudioFileSplitter.ENERGY_FRAME_MS // 1000)
+            window_frames = rate * AudioFileSplitter.STREAM_WINDOW_MS // 1000
+            # 已写入编码器的部分不能进入搜索区和下一段的重叠区
+            flush_limit = max_frames - search_frames - overlap_frames
+
+            index = 0
+            written = 0
+            chunk_start = 0  # 当前分段第一帧在原始音频中的位置
+            pending = np.empty((0, channels), dtype=np.int16)
+
+            def open_encoder():
+                return ChunkEncoder(f"{base_name}_part_{index + 1}", chunk_format, rate, channels)
+
+            def finish(chunk_encoder):
+                chunk = buffer_pool.store(chunk_encoder.name, chunk_encoder.close())
+                chunk.start_ms = chunk_start * 1000 // rate
+                parts = AudioFileSplitter.fit_chunk(chunk, chunk_format, rate, channels, max_bytes,
+                                                    overlap_frames, buffer_pool)
+                if stats is not None:
+                    stats['encoded_bytes'] += sum(part.size for part in parts)
+                return parts
+
+            while True:
+                block = stream.read(window_frames)
+                if len(block):
+                    pending = np.concatenate((pending, block))
+
+                while written + len(pending) >= max_frames:
+                    # 在目标边界之前的搜索区内找停顿
+                    lo = max_frames - search_frames - written
+                    region = pending[lo:max_frames - written].reshape(-1)
+                    cut = lo + AudioFileSplitter.quietest_frame(region, energy_frames * channels) * energy_frames
+                    cut = max(1, cut)
+
+                    if encoder is None:
+                        encoder = open_encoder()
+                    encoder.write(pending[:cut])
+                    chunk_encoder, encoder = encoder, None
+                    yield from finish(chunk_encoder)
+
+                    index += 1
+                    chunk_start += written + cut - overlap_frames
+                    written = 0
+                    pending = pending[cut - overlap_frames:]
+
+                # 超出保留区的样本直接送入当前分段
+                flush = min(len(pending), flush_limit - written)
+                if flush > 0:
+                    if encoder is None:
+                        encoder = open_encoder()
+                    encoder.write(pending[:flush])
+                    written += flush
+                    pending = pending[flush:]
+
+                if not len(block):
+                    break
 
-            return chunk_files
+            if written or len(pending):
+                if encoder is None:
+                    encoder = open_encoder()
+                encoder.write(pending)
+                chunk_encoder, encoder = encoder, None
+                yield from finish(chunk_encoder)
 
         except Exception as e:
             logger.error(f"音频文件分割失败: {e}")
             raise
+        finally:
+            stream.close()
+            if encoder is not None:
+                encoder.abort()
+
+    @staticmethod
+    def split_audio_file(file_path, max_size_mb=25, overlap_ms=0, chunk_format='flac'):
+        """分割音频文件，返回全部AudioChunk"""
+        return list(AudioFileSplitter.iter_audio_chunks(file_path, max_size_mb, overlap_ms, chunk_format))
+
+
+class TranscriptMerger:
+    """重叠分块转录结果合并 - 对齐上一段结尾与下一段开头的重叠文本，去掉重复部分后拼接
+
+    重叠必须从上一段的结尾开始、到下一段的开头为止（带边缘容错的重叠对齐），
+    只是碰巧相同的常见词不会被当成重叠。无法可靠对齐时换行拼接，宁可重复也不丢字。
+    """
+
+    CHARS_PER_SECOND = 15  # 估算重叠文本长度用的语速上限（英文约15字符/秒，中文更少）
+    EDGE_SLACK_CHARS = 12  # 重叠两端允许不相同的字符数（分块边缘被截断的词）
+
+    def __init__(self, overlap_ms=0, min_match_chars=8, min_match_ratio=0.6, chars_per_second=CHARS_PER_SECOND):
+        self.overlap_ms = overlap_ms
+        self.align = overlap_ms > 0  # 分块没有重叠时直接换行拼接
+        # 参与对齐的窗口为估算重叠长度的两倍，另留余量给分块边缘被截断的词
+        self.window_chars = int(overlap_ms / 1000 * chars_per_second) * 2 + 20
+        self.min_match_chars = min_match_chars  # 重叠中至少相同的字符数，单个常见英文词达不到
+        self.min_match_ratio = min_match_ratio  # 相同字符占对齐长度的最低比例
+        self.parts = []
+
+    def add(self, text):
+        """追加下一个分块的文本，可以边转录边合并"""
+        if not text:
+            return
+        if not self.parts:
+            self.parts.append(text)
+            return
+
+        spliced = self._splice(self.parts[-1], text) if self.align else None
+        if spliced is None:
+            self.parts.append("\n" + text)
+        else:
+            self.parts[-1], remainder = spliced
+            self.parts.append(remainder)
+
+    def text(self):
+        return "".join(self.parts)
+
+    def merge(self, texts):
+        """合并按顺序排列的分块文本"""
+        for text in texts:
+            self.add(text)
+        return self.text()
+
+    def _splice(self, previous, current):
+        """对齐previous结尾与current开头，返回(截断后的previous, current去重后的部分)，无法对齐时返回None
+
+        只在与重叠时长相称的窗口内比较，单次代价与转录总长度无关。
+        """
+        tail_start = max(0, len(previous) - self.window_chars)
+        tail = previous[tail_start:]
+        head = current[:self.window_chars]
+
+        pairs = self._overlap_alignment(tail, head)
+        if not pairs:
+            return None
+        # 相同部分必须延伸到上一段结尾和下一段开头，中间碰巧相同的短语不算重叠
+        if len(tail) - 1 - pairs[-1][0] > self.EDGE_SLACK_CHARS or pairs[0][1] > self.EDGE_SLACK_CHARS:
+            return None
+        aligned_length = max(len(tail) - pairs[0][0], pairs[-1][1] + 1)
+        if len(pairs) < self.min_match_chars or len(pairs) < self.min_match_ratio * aligned_length:
+            return None
+
+        # 分块边缘的文字最不可靠：重叠前半取上一段的版本，后半取下一段的版本
+        a, b = pairs[len(pairs) // 2]
+        return previous[:tail_start + a], current[b:]
+
+    @staticmethod
+    def _overlap_alignment(tail, head):
+        """重叠对齐：tail的任意后缀对齐head的前缀，相同+1、替换/插入/删除-2
+
+        tail必须对齐到结尾、head必须从开头对齐，边缘多出或被截断的字符按编辑扣分。
+        返回得分最高的对齐中相同字符的位置对[(tail下标, head下标), ...]，得分不为正时返回空列表。
+        """
+        n, m = len(tail), len(head)
+        # score[i][j]：tail[:i]的某个后缀与head[:j]对齐的最高得分，tail的前缀可以跳过
+        score = [[0] * (m + 1) for _ in range(n + 1)]
+        move = [[0] * (m + 1) for _ in range(n + 1)]  # 0起点 1对角 2跳过tail字符 3跳过head字符
+        for j in range(1, m + 1):
+            score[0][j] = -2 * j
+            move[0][j] = 3
+        for i in range(1, n + 1):
+            row, above = score[i], score[i - 1]
+            moves = move[i]
+            char = tail[i - 1]
+            for j in range(1, m + 1):
+                best = above[j - 1] + (1 if char == head[j - 1] else -2)
+                step = 1
+                if above[j] - 2 > best:
+                    best, step = above[j] - 2, 2
+                if row[j - 1] - 2 > best:
+                    best, step = row[j - 1] - 2, 3
+                row[j] = best
+                moves[j] = step
+
+        end = max(range(m + 1), key=lambda j: score[n][j])
+        if score[n][end] <= 0:
+            return []
+
+        pairs = []
+        i, j = n, end
+        while j > 0 and move[i][j]:
+            step = move[i][j]
+            if step == 1:
+                if tail[i - 1] == head[j - 1]:
+                    pairs.append((i - 1, j - 1))
+                i, j = i - 1, j - 1
+            elif step == 2:
+                i -= 1
+            else:
+                j -= 1
+        pairs.reverse()
+        return pairs
+
+
+class SegmentWriter:
+    """带时间戳分段的流式写入 - srt/vtt/json，每个分段到达即写出，不在内存中累积
+
+    先写临时文件，close时替换目标文件，中途失败不会留下半截的字幕文件。
+    """
+
+    FORMATS = ('srt', 'vtt', 'json')
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        self._temp_path = path + '.tmp'
+        self._file = open(self._temp_path, 'w', encoding='utf-8')
+        if fmt == 'vtt':
+            self._file.write("WEBVTT\n\n")
+        elif fmt == 'json':
+            self._file.write("[")
+
+    @staticmethod
+    def format_timestamp(seconds, decimal_marker):
+        millis = max(0, int(round(seconds * 1000)))
+        hours, millis = divmod(millis, 3600000)
+        minutes, millis = divmod(millis, 60000)
+        secs, millis = divmod(millis, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_marker}{millis:03d}"
+
+    def write(self, start, end, text):
+        self.count += 1
+        if self.fmt == 'srt':
+            self._file.write(f"{self.count}\n{self.format_timestamp(start, ',')} --> "
+                             f"{self.format_timestamp(end, ',')}\n{text}\n\n")
+        elif self.fmt == 'vtt':
+            self._file.write(f"{self.format_timestamp(start, '.')} --> {self.format_timestamp(end, '.')}\n{text}\n\n")
+        else:
+            entry = json.dumps({'start': round(start, 3), 'end': round(end, 3), 'text': text}, ensure_ascii=False)
+            self._file.write(("\n  " if self.count == 1 else ",\n  ") + entry)
+
+    def close(self):
+        if self.fmt == 'json':
+            self._file.write("\n]\n" if self.count else "]\n")
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        try:
+            self._file.close()
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+
+class TimedTranscriptAssembler:
+    """按分块顺序接收verbose_json结果，平移到原始音频时间轴后写入各格式的SegmentWriter
+
+    有重叠时以重叠区中点为界：之前的分段取上一块，之后的取下一块。
+    为此上一块的分段要等下一块的起始时间已知才写出，内存中最多保留一个分块的分段。
+    """
+
+    def __init__(self, output_base, formats, overlap_ms=0):
+        self.overlap_seconds = overlap_ms / 1000.0
+        self.writers = [SegmentWriter(f"{output_base}.{fmt}", fmt) for fmt in formats]
+        self.held_segments = []  # 上一块已平移的(start, end, text)
+
+    def add_chunk(self, payload, start_ms):
+        """处理一个分块的结果，返回其纯文本；不是verbose_json（如失败占位）时原样返回"""
+        try:
+            data = json.loads(payload)
+        except (TypeError, ValueError):
+            return payload
+        if not isinstance(data, dict):
+            return payload
+
+        offset = start_ms / 1000.0
+        boundary = offset + self.overlap_seconds / 2
+        for start, end, text in self.held_segments:
+            if not self.overlap_seconds or start < boundary:
+                self._write(start, end, text)
+
+        self.held_segments = []
+        for segment in data.get('segments') or []:
+            start = segment.get('start', 0) + offset
+            if self.overlap_seconds and offset > 0 and start < boundary:
+                continue
+            self.held_segments.append((start, segment.get('end', 0) + offset, (segment.get('text') or '').strip()))
+        return data.get('text', '')
+
+    def _write(self, start, end, text):
+        if text:
+            for writer in self.writers:
+                writer.write(start, end, text)
+
+    def close(self):
+        """写出最后一块的分段并完成所有文件，返回输出路径"""
+        for start, end, text in self.held_segments:
+            self._write(start, end, text)
+        self.held_segments = []
+        for writer in self.writers:
+            writer.close()
+        return [writer.path for writer in self.writers]
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+
+class TranscriptCache:
+    """按内容寻址的转录结果缓存 - 键为音频内容哈希加转录参数，按总大小LRU淘汰
+
+    每条结果存为一个文件，最近使用时间记录在文件修改时间上，启动时按它恢复LRU顺序。
+    同一目录在进程内共享一个实例，多个转录线程可以并发读写。
+    """
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> 大小，最近使用的在末尾
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    @classmethod
+    def shared(cls, cache_dir, max_bytes):
+        """获取目录对应的共享实例"""
+        with cls._instances_lock:
+            cache = cls._instances.get(cache_dir)
+            if cache is None:
+                cache = cls._instances[cache_dir] = cls(cache_dir, max_bytes)
+            cache.max_bytes = max_bytes
+            return cache
+
+    @staticmethod
+    def file_digest(file_path):
+        """流式计算文件的SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as source:
+            for block in iter(lambda: source.read(TranscriptCache.HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(content_digest, params):
+        """内容哈希与影响结果的参数（模型、语言、提示词、输出格式等）合成缓存键"""
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{content_digest}\n{payload}".encode('utf-8')).hexdigest()
+
+    def _load_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            found = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith('.txt'):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+            for _, key, size in sorted(found):
+                self.entries[key] = size
+                self.total_bytes += size
+            self._evict()
+        except Exception as e:
+            logger.error(f"加载转录缓存失败: {e}")
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.txt')
+
+    def get(self, key):
+        """返回缓存的结果，未命中返回None"""
+        with self._lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            path = self._path(key)
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            os.utime(path)
+            return text
+        except OSError:
+            with self._lock:
+                size = self.entries.pop(key, 0)
+                self.total_bytes -= size
+            return None
+
+    def put(self, key, text):
+        """写入结果（先写临时文件再替换，并发读取不会看到半截内容）"""
+        try:
+            data = text.encode('utf-8')
+            if len(data) > self.max_bytes:
+                return
+            path = self._path(key)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+            with self._lock:
+                self.total_bytes += len(data) - self.entries.pop(key, 0)
+                self.entries[key] = len(data)
+                self._evict()
+        except Exception as e:
+            logger.error(f"写入转录缓存失败: {e}")
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到总大小不超过上限（调用方持有锁或在初始化中）"""
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
 
 
 class UltraFastAudioRecorder:
@@ -1196,6 +2879,7 @@ class UltraFastAudioRecorder:
 
         self.audio_visualizer = None
         self.volume_indicator = None
+        self.spectrum_analyzer = None
         self.audio_queue = SafeQueue(maxsize=200)
         self.is_recording = False
         self.total_audio_bytes = 0
@@ -1220,10 +2904,11 @@ class UltraFastAudioRecorder:
             logger.error(f"初始化音频系统失败: {e}")
             return False
 
-    def set_visualizers(self, audio_visualizer, volume_indicator):
+    def set_visualizers(self, audio_visualizer, volume_indicator, spectrum_analyzer=None):
         """设置可视化组件"""
         self.audio_visualizer = audio_visualizer
         self.volume_indicator = volume_indicator
+        self.spectrum_analyzer = spectrum_analyzer
 
     def get_available_devices(self):
         """获取可用的音频输入设备"""
@@ -1321,8 +3006,10 @@ class UltraFastAudioRecorder:
             # 安全地添加到队列
             if self.audio_queue.put(filtered_data, timeout=0.001):
                 self.total_audio_bytes += len(filtered_data)
+                metrics.inc('audio_bytes_captured_total', len(filtered_data))
             else:
                 # 队列满时，清理一些旧数据
+                metrics.inc('audio_queue_drops_total')
                 for _ in range(10):
                     if self.audio_queue.get():
                         break
@@ -1332,6 +3019,10 @@ class UltraFastAudioRecorder:
                 if self.audio_visualizer and self.is_recording:
                     self.audio_visualizer.add_audio_data(filtered_data)
 
+                # 频谱在音频线程中计算，界面线程只负责写入图像
+                if self.spectrum_analyzer and self.is_recording:
+                    self.spectrum_analyzer.add_audio_data(filtered_data)
+
                 if self.volume_indicator and self.is_recording:
                     audio_array = np.frombuffer(filtered_data, dtype=np.int16)
                     if len(audio_array) > 0:
@@ -1359,6 +3050,8 @@ class UltraFastAudioRecorder:
                     break
                 audio_chunks.append(chunk)
 
+            metrics.set_gauge('audio_queue_depth', self.audio_queue.size())
+
             if audio_chunks:
                 return b''.join(audio_chunks)
             return None
@@ -1402,13 +3095,158 @@ class UltraFastAudioRecorder:
             logger.error(f"关闭录音器失败: {e}")
 
 
+class TranscriptItem:
+    """转录项目记录"""
+
+    __slots__ = ('id', 'previous_id', 'transcription', 'displayed_length', 'is_final',
+                 'start_time', 'last_update', 'prev', 'next')
+
+    def __init__(self, item_id, previous_id=None):
+        now = time.time()
+        self.id = item_id
+        self.previous_id = previous_id
+        self.transcription = ''
+        self.displayed_length = 0
+        self.is_final = False
+        self.start_time = now
+        self.last_update = now
+        self.prev = None
+        self.next = None
+
+
+class TranscriptItemStore:
+    """有界转录项目存储 - 按previous_item_id链接排序，插入和清理均为O(1)"""
+
+    def __init__(self, max_items=256, max_text_chars=20000, keep_final=3):
+        self.max_items = max_items  # 项目总数上限
+        self.max_text_chars = max_text_chars  # 单个项目文本上限
+        self.keep_final = keep_final  # 保留的最近完成项目数（供previous_item_id定位）
+
+        self._items = {}
+        self._head = None
+        self._tail = None
+        self._final_ids = OrderedDict()  # 按完成顺序记录已完成项目
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def get(self, item_id):
+        return self._items.get(item_id)
+
+    def ordered_ids(self):
+        """按链接顺序返回项目ID"""
+        ids = []
+        node = self._head
+        while node:
+            ids.append(node.id)
+            node = node.next
+        return ids
+
+    def add(self, item_id, previous_id=None):
+        """添加项目 - 若前一项目存在则插入其后，否则追加到末尾"""
+        existing = self._items.get(item_id)
+        if existing:
+            return existing
+
+        item = TranscriptItem(item_id, previous_id)
+        prev_node = self._items.get(previous_id) if previous_id else None
+        if prev_node is None:
+            prev_node = self._tail
+
+        item.prev = prev_node
+        if prev_node:
+            item.next = prev_node.next
+            prev_node.next = item
+        else:
+            item.next = self._head
+            self._head = item
+
+        if item.next:
+            item.next.prev = item
+        else:
+            self._tail = item
+
+        self._items[item_id] = item
+        self._enforce_limits()
+        return item
+
+    def append_text(self, item_id, delta):
+        """追加增量文本"""
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+
+        item.transcription += delta
+        if len(item.transcription) > self.max_text_chars:
+            item.transcription = item.transcription[-self.max_text_chars:]
+        item.last_update = time.time()
+        return item
+
+    def mark_final(self, item_id, final_text):
+        """标记项目完成"""
+        item = self._items.get(item_id)
+        if item is None:
+            return None
+
+        item.transcription = final_text[-self.max_text_chars:]
+        item.is_final = True
+        item.last_update = time.time()
+        self._final_ids[item_id] = None
+        self.cleanup_final(self.keep_final)
+        return item
+
+    def remove(self, item_id):
+        """移除项目"""
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+
+        if item.prev:
+            item.prev.next = item.next
+        else:
+            self._head = item.next
+        if item.next:
+            item.next.prev = item.prev
+        else:
+            self._tail = item.prev
+        item.prev = item.next = None
+        self._final_ids.pop(item_id, None)
+
+    def cleanup_final(self, keep_recent):
+        """清理较早完成的项目，只保留最近keep_recent个"""
+        while len(self._final_ids) > keep_recent:
+            oldest_id = next(iter(self._final_ids))
+            self.remove(oldest_id)
+
+    def _enforce_limits(self):
+        """超过上限时优先淘汰已完成项目，其次淘汰最早的未完成项目"""
+        while len(self._items) > self.max_items:
+            if self._final_ids:
+                self.remove(next(iter(self._final_ids)))
+            else:
+                logger.warning(f"转录项目超过上限 {self.max_items}，丢弃最早的未完成项目: {self._head.id}")
+                self.remove(self._head.id)
+
+    def clear(self):
+        """清空存储"""
+        node = self._head
+        while node:
+            next_node = node.next
+            node.prev = node.next = None
+            node = next_node
+        self._items.clear()
+        self._final_ids.clear()
+        self._head = self._tail = None
+
+
 class TypewriterASRManager:
     """打字机式ASR管理器 - 优化换行控制"""
 
     def __init__(self):
-        self.active_items = {}
-        self.item_order = []
-        self.character_queue = SafeQueue()
+        self.items = TranscriptItemStore()
         self.completed_items_count = 0
         self.line_break_interval = 7  # 7次转录后换行
 
@@ -1418,24 +3256,7 @@ class TypewriterASRManager:
         previous_item_id = data.get('previous_item_id')
 
         if item_id:
-            self.active_items[item_id] = {
-                'id': item_id,
-                'previous_id': previous_item_id,
-                'transcription': '',
-                'displayed_length': 0,
-                'is_final': False,
-                'start_time': time.time(),
-                'last_update': time.time()
-            }
-
-            if previous_item_id and previous_item_id in self.active_items:
-                try:
-                    prev_index = self.item_order.index(previous_item_id)
-                    self.item_order.insert(prev_index + 1, item_id)
-                except ValueError:
-                    self.item_order.append(item_id)
-            else:
-                self.item_order.append(item_id)
+            self.items.add(item_id, previous_item_id)
 
         return {
             'type': 'committed',
@@ -1448,39 +3269,28 @@ class TypewriterASRManager:
         item_id = data.get('item_id')
         delta = data.get('delta', '')
 
-        if item_id in self.active_items:
-            item = self.active_items[item_id]
-            item['transcription'] += delta
-            item['last_update'] = time.time()
-
-            # 为打字机效果准备字符
-            for char in delta:
-                self.character_queue.put((item_id, char))
-
+        item = self.items.append_text(item_id, delta)
+        if item:
             return {
                 'type': 'typewriter_delta',
                 'item_id': item_id,
                 'delta': delta,
-                'full_text': item['transcription'],
-                'displayed_length': item['displayed_length'],
+                'full_text': item.transcription,
+                'displayed_length': item.displayed_length,
                 'new_chars_count': len(delta)
             }
 
         return None
 
-    def get_next_character(self):
-        """获取下一个要显示的字符"""
-        return self.character_queue.get()
-
     def handle_transcription_completed(self, data):
         """处理转录完成"""
         item_id = data.get('item_id')
         final_transcript = data.get('transcript', '')
 
-        if item_id in self.active_items:
-            old_text = self.active_items[item_id]['transcription']
-            self.active_items[item_id]['transcription'] = final_transcript
-            self.active_items[item_id]['is_final'] = True
+        item = self.items.get(item_id)
+        if item:
+            old_text = item.transcription
+            self.items.mark_final(item_id, final_transcript)
 
             self.completed_items_count += 1
             should_break_line = (self.completed_items_count % self.line_break_interval == 0)
@@ -1497,26 +3307,97 @@ class TypewriterASRManager:
 
     def mark_character_displayed(self, item_id):
         """标记字符已显示"""
-        if item_id in self.active_items:
-            self.active_items[item_id]['displayed_length'] += 1
+        item = self.items.get(item_id)
+        if item:
+            item.displayed_length += 1
 
     def cleanup_final_items(self, keep_recent=3):
         """清理已完成的项目"""
         try:
-            final_items = [item_id for item_id in self.item_order
-                           if item_id in self.active_items and self.active_items[item_id]['is_final']]
-
-            if len(final_items) > keep_recent:
-                items_to_remove = final_items[:-keep_recent]
-                for item_id in items_to_remove:
-                    if item_id in self.active_items:
-                        del self.active_items[item_id]
-                    if item_id in self.item_order:
-                        self.item_order.remove(item_id)
+            self.items.cleanup_final(keep_recent)
         except Exception as e:
             logger.error(f"清理完成项目失败: {e}")
 
 
+class SessionTraceRecorder:
+    """会话事件记录器 - 将收发事件写入带时间戳的JSONL轨迹"""
+
+    def __init__(self, trace_path, store_audio=False):
+        self.trace_path = trace_path
+        self.pcm_path = os.path.splitext(trace_path)[0] + '.pcm' if store_audio else None
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._pcm_offset = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+        self._trace_file = open(trace_path, 'w', encoding='utf-8')
+        self._pcm_file = open(self.pcm_path, 'wb') if self.pcm_path else None
+
+        self._write_line(json.dumps({
+            't': 0.0, 'dir': 'meta',
+            'event': {'started_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+                      'pcm_file': os.path.basename(self.pcm_path) if self.pcm_path else None}
+        }, ensure_ascii=False))
+
+    @classmethod
+    def create_for_session(cls, trace_dir, store_audio=False):
+        """在轨迹目录中创建新的会话记录器"""
+        trace_path = os.path.join(trace_dir, f"session_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+        return cls(trace_path, store_audio)
+
+    def _elapsed(self):
+        return time.monotonic() - self._start_time
+
+    def _write_line(self, line):
+        with self._lock:
+            if self._trace_file:
+                self._trace_file.write(line + '\n')
+
+    def record_inbound(self, message):
+        """记录收到的服务器事件（原始JSON文本）"""
+        try:
+            # 原样嵌入服务器JSON，避免重复序列化；JSON字符串内的换行必然已被转义
+            event_text = message.replace('\r', ' ').replace('\n', ' ')
+            self._write_line(f'{{"t": {self._elapsed():.6f}, "dir": "in", "event": {event_text}}}')
+        except Exception as e:
+            logger.error(f"记录入站事件失败: {e}")
+
+    def record_outbound(self, message):
+        """记录发送的消息"""
+        try:
+            self._write_line(json.dumps({'t': round(self._elapsed(), 6), 'dir': 'out', 'event': message},
+                                        ensure_ascii=False))
+        except Exception as e:
+            logger.error(f"记录出站事件失败: {e}")
+
+    def record_audio(self, audio_data):
+        """记录音频发送 - 可选地将PCM写入旁路文件并只记录引用"""
+        try:
+            event = {'type': 'input_audio_buffer.append', 'audio_bytes': len(audio_data)}
+            if self._pcm_file:
+                with self._lock:
+                    self._pcm_file.write(audio_data)
+                    event['audio_ref'] = {'offset': self._pcm_offset, 'length': len(audio_data)}
+                    self._pcm_offset += len(audio_data)
+            self.record_outbound(event)
+        except Exception as e:
+            logger.error(f"记录音频事件失败: {e}")
+
+    def close(self):
+        """关闭轨迹文件"""
+        with self._lock:
+            try:
+                if self._trace_file:
+                    self._trace_file.close()
+                if self._pcm_file:
+                    self._pcm_file.close()
+            except Exception as e:
+                logger.error(f"关闭会话轨迹失败: {e}")
+            finally:
+                self._trace_file = None
+                self._pcm_file = None
+
+
 class UltraRealtimeTranscriber(QThread):
     """实时转录器 - 增强稳定性和网络处理"""
 
@@ -1555,9 +3436,12 @@ class UltraRealtimeTranscriber(QThread):
         self.transcription_start_time = None
         self.last_successful_send = time.time()
 
-    def set_visualizers(self, audio_visualizer, volume_indicator):
+        # 会话轨迹记录
+        self.trace_recorder = None
+
+    def set_visualizers(self, audio_visualizer, volume_indicator, spectrum_analyzer=None):
         """设置音频可视化组件"""
-        self.recorder.set_visualizers(audio_visualizer, volume_indicator)
+        self.recorder.set_visualizers(audio_visualizer, volume_indicator, spectrum_analyzer)
 
     def run(self):
         """主转录循环 - 增强异常处理"""
@@ -1565,12 +3449,23 @@ class UltraRealtimeTranscriber(QThread):
         self.is_stopping = False
         self.transcription_start_time = time.time()
 
+        if self.config.get('trace_enabled'):
+            try:
+                self.trace_recorder = SessionTraceRecorder.create_for_session(
+                    self.config.get('trace_dir') or os.path.join(os.path.expanduser("~"), ".openai_asr_traces"),
+                    self.config.get('trace_store_audio', False))
+                logger.info(f"📼 会话轨迹记录到: {self.trace_recorder.trace_path}")
+            except Exception as e:
+                logger.error(f"创建会话轨迹失败: {e}")
+                self.trace_recorder = None
+
         # 启动网络监控
         self.network_monitor.network_status_changed.connect(self._handle_network_status)
         self.network_monitor.start()
 
         while self.running and not self.is_stopping and self.reconnect_attempts < self.max_reconnect_attempts:
             try:
+                metrics.inc('connection_attempts_total')
                 self._establish_connection()
                 if self.is_connected:
                     self.reconnect_attempts = 0
@@ -1594,6 +3489,9 @@ class UltraRealtimeTranscriber(QThread):
             self.network_monitor.stop()
             self.network_monitor.wait(2000)
 
+        if self.trace_recorder:
+            self.trace_recorder.close()
+
     def _handle_network_status(self, is_connected, status_message):
         """处理网络状态变化"""
         if not is_connected and self.is_connected:
@@ -1648,6 +3546,7 @@ class UltraRealtimeTranscriber(QThread):
         try:
             logger.info("✅ 实时ASR连接已建立")
             self.is_connected = True
+            metrics.set_gauge('connected', 1)
             self.connection_status.emit("⚡ 已连接", "#00FF7F")
 
             self._send_optimized_config()
@@ -1695,6 +3594,8 @@ class UltraRealtimeTranscriber(QThread):
             logger.info("发送优化配置")
             if self.ws and self.is_connected:
                 self.ws.send(json.dumps(config_message))
+                if self.trace_recorder:
+                    self.trace_recorder.record_outbound(config_message)
 
         except Exception as e:
             logger.error(f"发送配置失败: {e}")
@@ -1829,6 +3730,11 @@ class UltraRealtimeTranscriber(QThread):
 
             self.ws.send(json.dumps(message))
             self.audio_chunks_sent += 1
+            metrics.inc('audio_chunks_sent_total')
+            metrics.inc('audio_bytes_sent_total', len(audio_data))
+
+            if self.trace_recorder:
+                self.trace_recorder.record_audio(audio_data)
 
             if self.audio_chunks_sent % 100 == 0:
                 logger.info(f"📊 已发送 {self.audio_chunks_sent} 个音频块")
@@ -1838,6 +3744,7 @@ class UltraRealtimeTranscriber(QThread):
         except Exception as e:
             if not self.is_stopping:
                 logger.error(f"发送音频块失败: {e}")
+                metrics.inc('audio_send_failures_total')
             return False
 
     def on_message(self, ws, message):
@@ -1845,10 +3752,15 @@ class UltraRealtimeTranscriber(QThread):
         if self.is_stopping:
             return
 
+        handle_start = time.perf_counter()
+        if self.trace_recorder:
+            self.trace_recorder.record_inbound(message)
+
         try:
             data = json.loads(message)
             msg_type = data.get('type', '')
             self.messages_received += 1
+            metrics.inc('messages_received_total', labels={'type': msg_type or 'unknown'})
 
             # 关键事件日志
             if msg_type in [
@@ -1891,6 +3803,8 @@ class UltraRealtimeTranscriber(QThread):
         except Exception as e:
             if not self.is_stopping:
                 logger.error(f"消息处理错误: {e}")
+        finally:
+            metrics.observe('message_handle_seconds', time.perf_counter() - handle_start)
 
     def _handle_api_error(self, data):
         """处理API错误"""
@@ -1927,6 +3841,8 @@ class UltraRealtimeTranscriber(QThread):
                 filtered_delta = self._filter_prompt_leakage(result['delta'])
 
                 if filtered_delta:
+                    metrics.inc('transcript_chars_total', len(filtered_delta))
+
                     # 发射信号，传递所有必要的参数
                     self.typewriter_delta.emit(
                         result['item_id'],
@@ -1949,6 +3865,8 @@ class UltraRealtimeTranscriber(QThread):
                 filtered_text = self._filter_prompt_leakage(result['final_text'])
 
                 if filtered_text:
+                    metrics.inc('transcriptions_completed_total')
+
                     # 发射信号，传递所有必要的参数
                     self.typewriter_completed.emit(
                         result['item_id'],
@@ -2003,6 +3921,7 @@ class UltraRealtimeTranscriber(QThread):
 
         self.is_connected = False
         self.connection_stable = False
+        metrics.set_gauge('connected', 0)
         self.connection_status.emit("❌ 连接错误", "#FF4545")
 
         error_msg = f"WebSocket错误: {str(error)}"
@@ -2015,6 +3934,7 @@ class UltraRealtimeTranscriber(QThread):
         """WebSocket连接关闭"""
         self.is_connected = False
         self.connection_stable = False
+        metrics.set_gauge('connected', 0)
 
         if not self.is_stopping:
             self.connection_status.emit("🔌 连接断开", "#FFD700")
@@ -2046,51 +3966,156 @@ class UltraRealtimeTranscriber(QThread):
         self.status_update.emit("⏹️ 已停止", "#FFD700")
 
 
+class SessionReplayWorker(UltraRealtimeTranscriber):
+    """会话回放器 - 将记录的轨迹按原始或加速速度重新送入转录显示管线"""
+
+    def __init__(self, trace_path, config, speed=1.0):
+        super().__init__(dict(config, trace_enabled=False))
+        self.trace_path = trace_path
+        self.speed = speed  # 0 表示不等待，尽快回放
+        self.events_replayed = 0
+        self.stop_event = threading.Event()  # 停止时立即结束事件间的等待
+
+    def run(self):
+        """按轨迹时间戳回放入站事件"""
+        self.running = True
+        self.is_stopping = False
+        self.stop_event.clear()
+        self.transcription_start_time = time.time()
+        self.connection_status.emit("▶️ 回放中", "#FFD700")
+        logger.info(f"▶️ 开始回放会话轨迹: {self.trace_path} (速度 x{self.speed})")
+
+        replay_start = time.monotonic()
+        try:
+            with open(self.trace_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not self.running or self.is_stopping:
+                        break
+
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    entry = json.loads(line)
+                    if entry.get('dir') != 'in':
+                        continue
+
+                    if self.speed > 0:
+                        wait_time = entry.get('t', 0) / self.speed - (time.monotonic() - replay_start)
+                        if wait_time > 0 and self.stop_event.wait(wait_time):
+                            break
+
+                    self.on_message(None, json.dumps(entry['event'], ensure_ascii=False))
+                    self.events_replayed += 1
+        except Exception as e:
+            error_msg = f"会话回放失败: {str(e)}"
+            logger.error(error_msg)
+            self.error_occurred.emit(error_msg)
+
+        logger.info(f"⏹️ 回放结束: {self.events_replayed} 个事件，用时 {time.monotonic() - replay_start:.2f}s")
+
+    def stop_transcription(self):
+        """停止回放 - 唤醒事件间的等待，线程可在wait()超时前退出"""
+        self.stop_event.set()
+        super().stop_transcription()
+
+
+class TypewriterPacer:
+    """打字机节奏控制器 - 根据积压量和目标最大显示延迟决定每帧显示的字符数"""
+
+    def __init__(self, char_interval_ms=12, target_lag_ms=300):
+        self.char_interval_ms = char_interval_ms  # 空闲时每个字符的间隔
+        self.target_lag = target_lag_ms / 1000.0  # 目标最大显示延迟（秒）
+
+    def chars_for_tick(self, backlog, dt):
+        """计算本帧应显示的字符数（可为小数，由调用方累积）"""
+        if backlog <= 0:
+            return 0.0
+        idle_rate = 1000.0 / max(1, self.char_interval_ms)
+        # 在目标延迟内显示完当前积压所需的速度
+        catchup_rate = backlog / max(0.001, self.target_lag)
+        return max(idle_rate, catchup_rate) * dt
+
+
+class WidgetStateBinder:
+    """脏标记界面绑定器 - 只在值变化时才更新控件"""
+
+    def __init__(self):
+        self._state = {}
+
+    def _changed(self, widget, attribute, value):
+        key = (id(widget), attribute)
+        if self._state.get(key) == value:
+            return False
+        self._state[key] = value
+        return True
+
+    def set_text(self, widget, text):
+        """设置文本（未变化时跳过）"""
+        if widget is not None and self._changed(widget, 'text', text):
+            widget.setText(text)
+
+    def set_style(self, widget, style):
+        """设置样式表（未变化时跳过）"""
+        if widget is not None and self._changed(widget, 'style', style):
+            widget.setStyleSheet(style)
+
+    def invalidate(self):
+        """清空缓存，下次更新强制刷新"""
+        self._state.clear()
+
+
 class TypewriterDisplayWidget(QTextBrowser):
     """打字机效果实时显示组件 - 修复颜色转换问题"""
 
-    def __init__(self):
+    def __init__(self, scheduler=None):
         super().__init__()
         self.setFont(QFont("Microsoft YaHei", 18, QFont.Normal))
 
-        # 打字机状态
+        # 打字机状态 - 每个项目持有待显示文本缓冲区和已显示位置
         self.typewriter_items = {}
-        self.display_order = []
-        self.character_queue = SafeQueue()
-        self.current_line_items = []  # 当前行的项目
+        self.display_order = OrderedDict()  # 有序集合，O(1)删除
+        self.current_line_items = OrderedDict()  # 当前行的项目
+        self._pending_items = OrderedDict()  # 仍有未显示文本的项目
+
+        # 自适应节奏 - 按积压和目标延迟调整显示速度，并测量实际显示延迟
+        self.pacer = TypewriterPacer()
+        self.display_lag = 0.0  # 最早未显示字符的等待时间（秒）
+        self._last_tick_time = time.monotonic()
 
         # 添加颜色转换锁，防止竞争条件
         self._conversion_mutex = QMutex()
 
-        # 打字机定时器
-        self.typewriter_timer = QTimer()
-        self.typewriter_timer.timeout.connect(self._process_typewriter_queue)
-        self.typewriter_timer.start(12)  # 12ms处理间隔
-
-        # 样式
-        self.streaming_style = """
-            color: #FFD700; 
-            background: rgba(255, 215, 0, 0.08); 
-            padding: 4px 8px; 
-            border-radius: 4px;
-            border-left: 2px solid #FFD700;
-            margin: 2px 0;
-            font-family: 'Microsoft YaHei', sans-serif;
-            line-height: 1.4;
-            display: inline;
-        """
-
-        self.completed_style = """
-            color: #00FF7F; 
-            background: rgba(0, 255, 127, 0.08); 
-            padding: 4px 8px; 
-            border-radius: 4px;
-            border-left: 2px solid #00FF7F;
-            margin: 2px 0;
-            font-family: 'Microsoft YaHei', sans-serif;
-            line-height: 1.4;
-            display: inline;
-        """
+        # 打字机帧任务 - 只在有待显示文本时运行，显示速度由节奏控制器决定
+        self.scheduler = scheduler or FrameScheduler(self)
+        self.scheduler.register('typewriter', self._process_typewriter_queue, 16)
+
+        # 缓存的字符格式 - 增量插入和完成变色都直接复用，避免HTML解析
+        self.streaming_format = QTextCharFormat()
+        self.streaming_format.setForeground(QColor("#FFD700"))
+        self.streaming_format.setBackground(QColor(255, 215, 0, 26))
+        self.streaming_format.setFontWeight(QFont.Medium)
+
+        self.completed_format = QTextCharFormat()
+        self.completed_format.setForeground(QColor("#00FF7F"))
+        self.completed_format.setBackground(QColor(0, 255, 127, 26))
+        self.completed_format.setFontWeight(QFont.Medium)
+
+        self.separator_format = QTextCharFormat()
+        self._item_sequence = 0
+
+        # 虚拟化显示 - 文档只保留最近的段落，较早的已完成段落以纯文本形式归档
+        self.auto_scroll_enabled = True
+        self.max_live_blocks = 400  # 文档中保留的最大段落数
+        self.trim_batch_blocks = 100  # 每次归档的段落数
+        self.page_blocks = 100  # 向上滚动时每次载回的段落数
+        self.max_inflight_items = 32  # 进行中项目上限，未收到完成事件的项目超过上限时按现有文本完成
+        self._scrollback = []  # 归档段落（从旧到新）
+        self._paging = False
+
+        # 增量统计 - 转录中的非空白字符数（含归档）
+        self.char_count = 0
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
 
         self.setStyleSheet("""
             QTextBrowser {
@@ -2109,142 +4134,157 @@ class TypewriterDisplayWidget(QTextBrowser):
         """)
 
     def add_typewriter_text(self, item_id, delta_text, full_text, displayed_length, new_chars_count):
-        """添加打字机文本"""
+        """添加打字机文本 - 整段追加到项目缓冲区"""
         try:
             with QMutexLocker(self._conversion_mutex):
-                # 将新字符加入队列
-                for char in delta_text:
-                    self.character_queue.put((item_id, char))
-
                 # 如果是新项目，创建占位符
                 if item_id not in self.typewriter_items:
                     self._create_typewriter_item(item_id)
+
+                item_info = self.typewriter_items.get(item_id)
+                if item_info and not item_info['is_finalizing']:
+                    if not self._pending_items:
+                        # 从空闲恢复，避免把空闲时长计入第一帧
+                        self._last_tick_time = time.monotonic()
+                    item_info['text'] += delta_text
+                    item_info['arrivals'].append((len(item_info['text']), time.monotonic()))
+                    self._pending_items[item_id] = None
+            self.scheduler.wake('typewriter')
         except Exception as e:
             logger.error(f"添加打字机文本失败: {e}")
 
     def _create_typewriter_item(self, item_id):
-        """创建打字机项目占位符"""
+        """创建打字机项目 - 在文档末尾记录一个空区间"""
         try:
-            cursor = self.textCursor()
-            cursor.movePosition(QTextCursor.End)
-
-            start_position = cursor.position()
-
-            # 创建空的占位符，避免初始HTML冲突
-            placeholder_html = f"""<span id='item_{item_id}' class='streaming'></span>"""
-            cursor.insertHtml(placeholder_html)
+            end_position = self.document().characterCount() - 1
 
             # 记录项目信息
+            self._item_sequence += 1
             self.typewriter_items[item_id] = {
-                'start_position': start_position,
-                'end_position': cursor.position(),
-                'text': '',
-                'displayed_text': '',
+                'seq': self._item_sequence,  # 创建顺序，用于区分同一位置的项目
+                'start_position': end_position,
+                'end_position': end_position,
+                'text': '',  # 已收到的全部文本
+                'revealed': 0,  # 已显示到的位置
+                'rendered': 0,  # 已写入文档的字符数
+                'arrivals': deque(),  # (文本结束位置, 到达时间)，用于测量显示延迟
+                'credit': 0.0,  # 节奏控制累积的小数字符
                 'is_typing': True,
                 'is_finalizing': False  # 添加标志防止重复处理
             }
 
             if item_id not in self.display_order:
-                self.display_order.append(item_id)
-                self.current_line_items.append(item_id)
-
-            self._auto_scroll()
+                self.display_order[item_id] = None
+                self.current_line_items[item_id] = None
+
+            # 服务器未发送完成事件的项目会一直占用记录并阻止文档裁剪，超过上限时完成最早的项目
+            while len(self.typewriter_items) > self.max_inflight_items:
+                stale_id = next(iter(self.typewriter_items))
+                logger.warning(f"进行中项目超过上限 {self.max_inflight_items}，按已收到文本完成: {stale_id}")
+                self._finalize_item(stale_id, self.typewriter_items[stale_id]['text'])
         except Exception as e:
             logger.error(f"创建打字机项目失败: {e}")
 
     def _process_typewriter_queue(self):
-        """处理打字机字符队列 - 修复处理逻辑"""
+        """打字机帧处理 - 按节奏控制器推进各项目的显示位置，返回是否仍有待显示文本"""
         try:
-            # 限制处理字符数量，避免UI阻塞
-            max_chars_per_cycle = 5
-            processed_count = 0
-
-            while processed_count < max_chars_per_cycle:
-                char_data = self.character_queue.get()
-                if char_data is None:
-                    break
-
-                item_id, char = char_data
-
-                # 检查项目是否还在活跃状态
-                if item_id in self.typewriter_items and not self.typewriter_items[item_id].get('is_finalizing', False):
-                    self._add_character_to_item(item_id, char)
-                    processed_count += 1
-                else:
-                    # 如果项目已经完成或不存在，跳过这个字符
-                    continue
+            now = time.monotonic()
+            dt = min(0.1, max(0.0, now - self._last_tick_time))
+            self._last_tick_time = now
+            cutoff = now - self.pacer.target_lag
+            max_lag = 0.0
 
-        except Exception as e:
-            logger.error(f"打字机处理错误: {e}")
+            with QMutexLocker(self._conversion_mutex):
+                # 只遍历仍有待显示文本的项目
+                for item_id in list(self._pending_items):
+                    item_info = self.typewriter_items.get(item_id)
+                    if item_info is None or item_info['is_finalizing']:
+                        self._pending_items.pop(item_id, None)
+                        continue
+
+                    backlog = len(item_info['text']) - item_info['revealed']
+                    if backlog > 0:
+                        item_info['credit'] += self.pacer.chars_for_tick(backlog, dt)
+                        step = int(item_info['credit'])
+                        item_info['credit'] -= step
+
+                        # 超过目标延迟的字符必须立即显示
+                        arrivals = item_info['arrivals']
+                        for end_offset, arrival_time in arrivals:
+                            if arrival_time > cutoff:
+                                break
+                            step = max(step, end_offset - item_info['revealed'])
 
-    def _add_character_to_item(self, item_id, char):
-        """向项目添加字符 - 改进显示更新"""
-        try:
-            if item_id not in self.typewriter_items:
-                self._create_typewriter_item(item_id)
+                        step = min(step, backlog)
+                        if step > 0:
+                            item_info['revealed'] += step
+                            self._update_typewriter_display(item_id)
 
-            item_info = self.typewriter_items[item_id]
+                        # 丢弃已完全显示的到达记录，剩余最早记录即为当前延迟
+                        while arrivals and arrivals[0][0] <= item_info['revealed']:
+                            arrivals.popleft()
+                        if arrivals:
+                            max_lag = max(max_lag, now - arrivals[0][1])
 
-            # 如果正在完成中，不再添加字符
-            if item_info.get('is_finalizing', False):
-                return
+                    if item_info['revealed'] >= len(item_info['text']):
+                        item_info['credit'] = 0.0
+                        self._pending_items.pop(item_id, None)
 
-            item_info['displayed_text'] += char
+            self.display_lag = max_lag
+            metrics.set_gauge('typewriter_pending_age_seconds', max_lag)
+            if self._pending_items:
+                metrics.observe('typewriter_display_lag_seconds', max_lag)
+            return bool(self._pending_items)
 
-            # 批量更新显示，减少频繁的DOM操作
-            if len(item_info['displayed_text']) % 3 == 0 or char in [' ', '，', '。', '！', '？', '.', '!', '?']:
-                self._update_typewriter_display(item_id)
         except Exception as e:
-            logger.error(f"添加字符失败: {e}")
+            logger.error(f"打字机处理错误: {e}")
+            return False
 
     def _update_typewriter_display(self, item_id):
-        """更新打字机显示 - 确保样式正确"""
+        """更新打字机显示 - 只在项目末尾追加新显示的字符"""
         try:
-            if item_id not in self.typewriter_items:
+            item_info = self.typewriter_items.get(item_id)
+            if item_info is None or item_info['is_finalizing']:
                 return
 
-            item_info = self.typewriter_items[item_id]
-
-            # 如果正在完成中，不再更新
-            if item_info.get('is_finalizing', False):
+            new_text = item_info['text'][item_info['rendered']:item_info['revealed']]
+            if not new_text:
                 return
 
-            # 移动到项目位置
-            cursor = self.textCursor()
-            cursor.setPosition(item_info['start_position'])
-            cursor.setPosition(item_info['end_position'], QTextCursor.KeepAnchor)
-
-            # 转义特殊字符
-            escaped_text = (item_info['displayed_text']
-                            .replace('&', '&amp;')
-                            .replace('<', '&lt;')
-                            .replace('>', '&gt;')
-                            .replace('"', '&quot;')
-                            .replace("'", '&#39;'))
-
-            # 确保使用统一的黄色流式样式
-            streaming_html = f"""
-            <span id='item_{item_id}' style='
-                color: #FFD700 !important; 
-                background: rgba(255, 215, 0, 0.1) !important; 
-                padding: 2px 4px; 
-                border-radius: 3px; 
-                font-weight: 500;
-                border-left: 2px solid #FFD700;
-            '>{escaped_text}</span>
-            """
-
-            cursor.insertHtml(streaming_html)
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(item_info['end_position'])
+            cursor.insertText(new_text, self.streaming_format)
+            self.char_count += self._count_chars(new_text)
 
-            # 更新位置信息
+            # 更新位置信息，并平移其后仍在进行中的项目
+            inserted = cursor.position() - item_info['end_position']
+            self._shift_items_after(item_info['end_position'], inserted, item_info['seq'])
             item_info['end_position'] = cursor.position()
+            item_info['rendered'] = item_info['revealed']
 
             self._auto_scroll()
         except Exception as e:
             logger.error(f"更新打字机显示失败: {e}")
 
+    def _shift_items_after(self, position, delta, source_seq):
+        """文档在position处长度变化delta后，平移其后项目的位置记录"""
+        if not delta:
+            return
+        for other_info in self.typewriter_items.values():
+            start = other_info['start_position']
+            if start > position or (start == position and other_info['seq'] > source_seq):
+                other_info['start_position'] += delta
+                other_info['end_position'] += delta
+
+    def _insert_separator(self, cursor, should_break_line):
+        """在完成文本后插入空格或换行"""
+        if should_break_line:
+            cursor.insertBlock()
+        else:
+            cursor.insertText(" ", self.separator_format)
+
     def finalize_typewriter_item(self, item_id, final_text, previous_text, should_break_line=False):
-        """完成打字机项目 - 强制转换为绿色并清理"""
+        """完成打字机项目 - 对已有区间应用完成格式，仅在文本不同时替换"""
         try:
             with QMutexLocker(self._conversion_mutex):
                 # 如果项目不存在，直接添加为完成文本
@@ -2252,164 +4292,229 @@ class TypewriterDisplayWidget(QTextBrowser):
                     self._add_completed_text(item_id, final_text, should_break_line)
                     return
 
-                # 标记为正在完成，防止继续添加字符
-                self.typewriter_items[item_id]['is_finalizing'] = True
+                self._finalize_item(item_id, final_text, should_break_line)
 
-                # 清空该项目相关的队列字符
-                self._clear_item_from_queue(item_id)
+        except Exception as e:
+            logger.error(f"完成打字机项目失败: {e}")
+            # 如果出现异常，尝试强制清理
+            try:
+                if item_id in self.typewriter_items:
+                    del self.typewriter_items[item_id]
+                self._pending_items.pop(item_id, None)
+            except:
+                pass
 
-                item_info = self.typewriter_items[item_id]
+    def _finalize_item(self, item_id, final_text, should_break_line=False):
+        """完成进行中的项目（调用方需持有转换锁）"""
+        # 标记为正在完成，O(1)丢弃该项目未显示的缓冲文本，其他项目不受影响
+        item_info = self.typewriter_items[item_id]
+        item_info['is_finalizing'] = True
+        self._pending_items.pop(item_id, None)
+
+        old_end = item_info['end_position']
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(item_info['start_position'])
+        cursor.setPosition(old_end, QTextCursor.KeepAnchor)
+
+        if item_info['text'][:item_info['rendered']] == final_text:
+            # 文本一致，只修改格式
+            cursor.setCharFormat(self.completed_format)
+        else:
+            # 文本有修正，用最终文本替换该区间
+            cursor.insertText(final_text, self.completed_format)
+            self.char_count += (self._count_chars(final_text)
+                                - self._count_chars(item_info['text'][:item_info['rendered']]))
 
-                # 移动到项目位置并完全替换内容
-                cursor = self.textCursor()
-                cursor.setPosition(item_info['start_position'])
-                cursor.setPosition(item_info['end_position'], QTextCursor.KeepAnchor)
+        cursor.clearSelection()
+        self._insert_separator(cursor, should_break_line)
+
+        # 清除打字机项目记录，并平移其后仍在进行中的项目
+        del self.typewriter_items[item_id]
+        self._shift_items_after(old_end, cursor.position() - old_end, item_info['seq'])
+        self.display_order.pop(item_id, None)
+        self.current_line_items.pop(item_id, None)
+
+        # 如果需要换行，清空当前行项目列表
+        if should_break_line:
+            self.current_line_items.clear()
+
+        self._auto_scroll()
+        self._trim_live_document()
 
-                # 完全清除选中内容
-                cursor.removeSelectedText()
+        logger.debug(f"✅ 成功完成项目 {item_id}，文本已转为绿色")
 
-                # 转义最终文本
-                escaped_text = (final_text
-                                .replace('&', '&amp;')
-                                .replace('<', '&lt;')
-                                .replace('>', '&gt;')
-                                .replace('"', '&quot;')
-                                .replace("'", '&#39;'))
+    def _add_completed_text(self, item_id, final_text, should_break_line=False):
+        """添加完成文本 - 直接绿色显示"""
+        try:
+            cursor = QTextCursor(self.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(final_text, self.completed_format)
+            self.char_count += self._count_chars(final_text)
+            self._insert_separator(cursor, should_break_line)
+            self._auto_scroll()
+            self._trim_live_document()
+        except Exception as e:
+            logger.error(f"添加完成文本失败: {e}")
+
+    def insert_html_block(self, html, plain_text):
+        """在末尾插入HTML内容块（如文件转录结果）"""
+        try:
+            cursor = QTextCursor(self.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertHtml(html)
+            self.char_count += self._count_chars(plain_text)
+            self._auto_scroll()
+            self._trim_live_document()
+        except Exception as e:
+            logger.error(f"插入内容块失败: {e}")
 
-                line_break = "<br>" if should_break_line else " "
+    @staticmethod
+    def _count_chars(text):
+        """统计字数（不计空格和换行）"""
+        return len(text) - text.count(' ') - text.count('\n')
 
-                # 使用强制的绿色样式，确保完全覆盖黄色
-                completed_html = f"""
-                <span style='
-                    color: #00FF7F !important; 
-                    background: rgba(0, 255, 127, 0.1) !important; 
-                    padding: 2px 4px; 
-                    border-radius: 3px; 
-                    font-weight: 500; 
-                    border-left: 2px solid #00FF7F !important;
-                '>{escaped_text}</span>{line_break}
-                """
+    def _trim_live_document(self):
+        """文档段落过多时，将最早的已完成段落移入归档"""
+        try:
+            document = self.document()
+            if document.blockCount() <= self.max_live_blocks + self.trim_batch_blocks:
+                return
 
-                cursor.insertHtml(completed_html)
+            # 用户正在向上翻看时不裁剪，避免内容跳动
+            scrollbar = self.verticalScrollBar()
+            if not self.auto_scroll_enabled and scrollbar.value() < scrollbar.maximum():
+                return
 
-                # 清除打字机项目记录
-                del self.typewriter_items[item_id]
-                if item_id in self.display_order:
-                    self.display_order.remove(item_id)
-                if item_id in self.current_line_items:
-                    self.current_line_items.remove(item_id)
+            trim_count = document.blockCount() - self.max_live_blocks
+            boundary = document.findBlockByNumber(trim_count).position()
 
-                # 如果需要换行，清空当前行项目列表
-                if should_break_line:
-                    self.current_line_items.clear()
+            # 只归档完全位于进行中项目之前的段落
+            for item_info in self.typewriter_items.values():
+                if item_info['start_position'] < boundary:
+                    return
 
-                self._auto_scroll()
+            block = document.begin()
+            for _ in range(trim_count):
+                self._scrollback.append(block.text())
+                block = block.next()
 
-                logger.debug(f"✅ 成功完成项目 {item_id}，文本已转为绿色")
+            cursor = QTextCursor(document)
+            cursor.setPosition(0)
+            cursor.setPosition(boundary, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+            self._shift_items_after(-1, -boundary, 0)
 
+            logger.debug(f"归档 {trim_count} 个段落，归档总数: {len(self._scrollback)}")
         except Exception as e:
-            logger.error(f"完成打字机项目失败: {e}")
-            # 如果出现异常，尝试强制清理
-            try:
-                if item_id in self.typewriter_items:
-                    del self.typewriter_items[item_id]
-            except:
-                pass
+            logger.error(f"裁剪显示文档失败: {e}")
+
+    def _on_scroll(self, value):
+        """滚动到顶部时载回归档内容"""
+        if self._paging or not self._scrollback:
+            return
+        if value <= self.verticalScrollBar().minimum():
+            self._page_in_scrollback(self.page_blocks)
+
+    def _page_in_scrollback(self, block_count):
+        """从归档中载回最近的block_count个段落到文档顶部"""
+        if not self._scrollback or block_count <= 0:
+            return
 
-    def _clear_item_from_queue(self, item_id):
-        """从队列中清除指定项目的所有字符"""
+        self._paging = True
         try:
-            # 临时存储其他项目的字符
-            temp_chars = []
+            scrollbar = self.verticalScrollBar()
+            old_value = scrollbar.value()
+            old_maximum = scrollbar.maximum()
 
-            # 清空队列并过滤掉指定项目的字符
-            while not self.character_queue.empty():
-                char_data = self.character_queue.get()
-                if char_data and char_data[0] != item_id:
-                    temp_chars.append(char_data)
+            blocks = self._scrollback[-block_count:]
+            del self._scrollback[-block_count:]
 
-            # 将其他项目的字符重新加入队列
-            for char_data in temp_chars:
-                self.character_queue.put(char_data)
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(0)
+            for text in blocks:
+                cursor.insertText(text, self.completed_format)
+                cursor.insertBlock()
+            self._shift_items_after(-1, cursor.position(), 0)
 
+            # 保持当前可见内容不动
+            scrollbar.setValue(old_value + scrollbar.maximum() - old_maximum)
         except Exception as e:
-            logger.error(f"清理队列失败: {e}")
-
-    def _add_completed_text(self, item_id, final_text, should_break_line=False):
-        """添加完成文本 - 直接绿色显示"""
+            logger.error(f"载回归档内容失败: {e}")
+        finally:
+            self._paging = False
+
+    def full_plain_text(self):
+        """获取完整转录文本（包括已归档部分）"""
+        live_text = self.toPlainText()
+        if not self._scrollback:
+            return live_text
+        return '\n'.join(self._scrollback) + '\n' + live_text
+
+    def find_in_transcript(self, query):
+        """在完整转录中向前查找，必要时载回归档内容"""
         try:
-            cursor = self.textCursor()
-            cursor.movePosition(QTextCursor.End)
+            if not query:
+                return False
+            if self.find(query):
+                return True
 
-            line_break = "<br>" if should_break_line else " "
-            escaped_text = (final_text
-                            .replace('&', '&amp;')
-                            .replace('<', '&lt;')
-                            .replace('>', '&gt;')
-                            .replace('"', '&quot;')
-                            .replace("'", '&#39;'))
-
-            # 直接使用绿色完成样式
-            completed_html = f"""
-            <span style='
-                color: #00FF7F !important; 
-                background: rgba(0, 255, 127, 0.1) !important; 
-                padding: 2px 4px; 
-                border-radius: 3px; 
-                font-weight: 500; 
-                border-left: 2px solid #00FF7F !important;
-            '>{escaped_text}</span>{line_break}
-            """
+            # 在文档中从头再找一次
+            cursor = self.textCursor()
+            cursor.movePosition(QTextCursor.Start)
+            self.setTextCursor(cursor)
+            if self.find(query):
+                return True
 
-            cursor.insertHtml(completed_html)
-            self._auto_scroll()
+            # 在归档中从新到旧查找，载回到包含匹配的段落为止
+            for index in range(len(self._scrollback) - 1, -1, -1):
+                if query in self._scrollback[index]:
+                    self._page_in_scrollback(len(self._scrollback) - index)
+                    cursor = self.textCursor()
+                    cursor.movePosition(QTextCursor.Start)
+                    self.setTextCursor(cursor)
+                    return self.find(query)
+            return False
         except Exception as e:
-            logger.error(f"添加完成文本失败: {e}")
+            logger.error(f"查找转录内容失败: {e}")
+            return False
+
+    def clear(self):
+        """清空文档和归档"""
+        super().clear()
+        self._scrollback.clear()
+        self.char_count = 0
 
     def _force_convert_all_to_green(self):
-        """强制将所有黄色文本转换为绿色 - 清理函数"""
+        """将仍在进行中的项目转换为绿色 - 只处理活跃项目的区间"""
         try:
-            # 获取所有文本内容
-            html_content = self.toHtml()
-
-            # 替换所有黄色样式为绿色
-            html_content = html_content.replace('#FFD700', '#00FF7F')
-            html_content = html_content.replace('255, 215, 0', '0, 255, 127')
-            html_content = html_content.replace('rgba(255, 215, 0', 'rgba(0, 255, 127')
-
-            # 重新设置内容
-            self.setHtml(html_content)
+            cursor = QTextCursor(self.document())
+            converted = 0
+            for item_info in self.typewriter_items.values():
+                if item_info['end_position'] <= item_info['start_position']:
+                    continue
+                cursor.setPosition(item_info['start_position'])
+                cursor.setPosition(item_info['end_position'], QTextCursor.KeepAnchor)
+                cursor.setCharFormat(self.completed_format)
+                converted += 1
 
-            logger.debug("强制转换所有文本为绿色完成")
+            logger.debug(f"强制转换 {converted} 个进行中项目为绿色完成")
         except Exception as e:
             logger.error(f"强制转换颜色失败: {e}")
 
     def clear_all_typewriter(self):
         """清除所有打字机项目 - 确保完全清理"""
         try:
-            # 首先停止定时器
-            if hasattr(self, 'typewriter_timer'):
-                self.typewriter_timer.stop()
-
             with QMutexLocker(self._conversion_mutex):
                 # 强制转换所有未完成的文本为绿色
                 self._force_convert_all_to_green()
 
-                # 清理所有状态
+                # 清理所有状态（待显示缓冲随项目一起丢弃）
                 self.typewriter_items.clear()
                 self.display_order.clear()
                 self.current_line_items.clear()
-
-                # 彻底清空字符队列
-                queue_cleared = 0
-                while not self.character_queue.empty() and queue_cleared < 1000:
-                    if self.character_queue.get() is None:
-                        break
-                    queue_cleared += 1
-
-            # 重新启动定时器
-            if hasattr(self, 'typewriter_timer'):
-                self.typewriter_timer.start(12)
+                self._pending_items.clear()
+                self._last_tick_time = time.monotonic()
+                self.display_lag = 0.0
 
         except Exception as e:
             logger.error(f"清除打字机项目失败: {e}")
@@ -2417,6 +4522,8 @@ class TypewriterDisplayWidget(QTextBrowser):
     def _auto_scroll(self):
         """自动滚动到底部"""
         try:
+            if not self.auto_scroll_enabled:
+                return
             scrollbar = self.verticalScrollBar()
             scrollbar.setValue(scrollbar.maximum())
         except Exception as e:
@@ -2431,14 +4538,44 @@ class FileTranscriptionWorker(QThread):
     error_occurred = pyqtSignal(str)
     status_update = pyqtSignal(str, str)
 
-    def __init__(self, file_path, config, output_format='text'):
+    def __init__(self, file_path, config, output_format='text', api_semaphore=None, journal=None):
         super().__init__()
         self.file_path = file_path
         self.config = config
         self.output_format = output_format
         self.is_cancelled = False
+        self._cancel_event = threading.Event()  # 取消时立即结束重试等待
         self.max_file_size_mb = 25
 
+        # 分块并发上传与重试
+        self.max_concurrency = max(1, int(config.get('file_concurrency', 4)))
+        self.max_retries = max(0, int(config.get('file_max_retries', 3)))
+        self.retry_backoff = 1.0  # 首次重试等待秒数，之后翻倍
+
+        # 可选的分块重叠，合并时去除重复文本
+        self.chunk_overlap_ms = max(0, int(config.get('file_chunk_overlap_ms', 0)))
+
+        # 分段上传编码格式（flac/mp3/wav），未知格式回退为flac
+        self.chunk_format = config.get('file_chunk_format', 'flac')
+        if self.chunk_format not in AudioFileSplitter.CHUNK_FORMATS:
+            self.chunk_format = 'flac'
+
+        # 编码后的分段留在内存中直接上传，超过预算的部分溢出到临时文件
+        self.memory_budget_mb = max(0, config.get('file_memory_budget_mb', 256))
+
+        # 转录结果缓存，在run中打开
+        self.cache = None
+
+        # 带时间戳的输出（srt/vtt/json），此时向接口请求verbose_json，文件默认写在音频旁边
+        self.timestamp_formats = [fmt for fmt in config.get('file_timestamp_formats', [])
+                                  if fmt in SegmentWriter.FORMATS]
+        self.timestamp_output_base = None
+        self.request_format = 'verbose_json' if self.timestamp_formats else output_format
+
+        # 批量转录时由调度方传入：全局请求并发上限和记录分块进度的任务日志
+        self.api_slots = api_semaphore if api_semaphore is not None else contextlib.nullcontext()
+        self.journal = journal
+
     def run(self):
         """执行文件转录"""
         try:
@@ -2448,6 +4585,8 @@ class FileTranscriptionWorker(QThread):
             file_size_mb = os.path.getsize(self.file_path) / (1024 * 1024)
             logger.info(f"文件大小: {file_size_mb:.2f} MB")
 
+            self.cache = self._open_cache()
+
             if file_size_mb > self.max_file_size_mb:
                 self._handle_large_file()
             else:
@@ -2480,37 +4619,56 @@ class FileTranscriptionWorker(QThread):
         try:
             self.status_update.emit("📝 开始转录...", "#00FF7F")
 
-            with open(self.file_path, 'rb') as audio_file:
-                params = {
-                    "model": "whisper-1",
-                    "file": audio_file,
-                    "response_format": self.output_format
-                }
+            cache_key, text = self._cache_lookup('file', self.file_path)
+            cached = text is not None
+            if not cached:
+                with open(self.file_path, 'rb') as audio_file:
+                    params = {
+                        "model": "whisper-1",
+                        "file": audio_file,
+                        "response_format": self.request_format
+                    }
 
-                self._add_optional_params(params)
-                self.progress_update.emit(70)
+                    self._add_optional_params(params)
+                    self.progress_update.emit(70)
 
-                if self.is_cancelled:
-                    return
+                    if self.is_cancelled:
+                        return
 
-                response = client.audio.transcriptions.create(**params)
-                self.progress_update.emit(90)
+                    response = self._request_transcription(client, params)
+                    if response is None:
+                        return
+                    self.progress_update.emit(90)
 
-                text = response.text if hasattr(response, 'text') else str(response)
+                    text = self._response_payload(response)
+                    if text and cache_key:
+                        self.cache.put(cache_key, text)
 
-                if text and not self.is_cancelled:
-                    timestamp = time.strftime("%H:%M:%S")
-                    metadata = {
-                        'source': 'file_standard',
-                        'format': self.output_format,
-                        'file_path': self.file_path,
-                        'file_size': os.path.getsize(self.file_path)
-                    }
+            if text and not self.is_cancelled:
+                timestamp_files = []
+                if self.timestamp_formats:
+                    timed_output = self._open_timed_output()
+                    try:
+                        text = timed_output.add_chunk(text, 0)
+                        timestamp_files = timed_output.close()
+                    except Exception:
+                        timed_output.abort()
+                        raise
+
+                timestamp = time.strftime("%H:%M:%S")
+                metadata = {
+                    'source': 'file_standard',
+                    'format': self.output_format,
+                    'file_path': self.file_path,
+                    'file_size': os.path.getsize(self.file_path),
+                    'timestamp_files': timestamp_files,
+                    'cached': cached
+                }
 
-                    self.transcription_ready.emit(text, timestamp, metadata)
+                self.transcription_ready.emit(text, timestamp, metadata)
 
-                self.progress_update.emit(100)
-                self.status_update.emit("✅ 转录完成", "#00FF7F")
+            self.progress_update.emit(100)
+            self.status_update.emit("✅ 转录完成", "#00FF7F")
 
         except Exception as e:
             error_msg = f"标准转录失败: {str(e)}"
@@ -2522,70 +4680,76 @@ class FileTranscriptionWorker(QThread):
         try:
             self.status_update.emit("📋 正在分割大文件...", "#FFD700")
 
-            if not HAS_PYDUB:
-                self.error_occurred.emit("处理大文件需要安装 pydub: pip install pydub")
+            # 16位WAV不需要pydub，其他格式由PcmStreamReader提示安装pydub
+            # 整个文件命中缓存时不需要解码（整体缓存只有纯文本，需要时间戳输出时按分块处理）
+            cache_key, final_text = None, None
+            if not self.timestamp_formats:
+                cache_key, final_text = self._cache_lookup('file', self.file_path, split=True)
+            if final_text is not None:
+                if not self.is_cancelled:
+                    metadata = {
+                        'source': 'file_large_split',
+                        'format': self.output_format,
+                        'file_path': self.file_path,
+                        'file_size': os.path.getsize(self.file_path),
+                        'chunk_format': self.chunk_format,
+                        'cached': True
+                    }
+                    self.transcription_ready.emit(final_text, time.strftime("%H:%M:%S"), metadata)
+                self.progress_update.emit(100)
+                self.status_update.emit("✅ 大文件转录完成（缓存）", "#00FF7F")
                 return
 
-            # 分割文件
-            chunk_files = AudioFileSplitter.split_audio_file(self.file_path, self.max_file_size_mb)
-
-            if self.is_cancelled:
-                return
+            # 流式分割，每生成一段就提交转录
+            split_stats = {}
+            buffer_pool = ChunkBufferPool(int(self.memory_budget_mb * 1024 * 1024))
+            chunks = AudioFileSplitter.iter_audio_chunks(self.file_path, self.max_file_size_mb,
+                                                         self.chunk_overlap_ms, self.chunk_format,
+                                                         split_stats, buffer_pool)
 
             self.progress_update.emit(30)
 
-            # 转录各个分块
+            # 分割、并发转录、按顺序合并三级流水线
             client = self._create_openai_client()
-            all_transcriptions = []
-
-            total_chunks = len(chunk_files)
+            merger = TranscriptMerger(self.chunk_overlap_ms)
+            timed_output = self._open_timed_output() if self.timestamp_formats else None
+            try:
+                total_chunks, failed_chunks = self._run_chunk_pipeline(client, chunks, merger, timed_output,
+                                                                       split_stats)
+            except BaseException:
+                if timed_output is not None:
+                    timed_output.abort()
+                raise
 
-            for i, chunk_file in enumerate(chunk_files):
+            timestamp_files = []
+            if timed_output is not None:
                 if self.is_cancelled:
-                    break
-
-                self.status_update.emit(f"📝 转录第 {i + 1}/{total_chunks} 部分...", "#00FF7F")
-
-                try:
-                    with open(chunk_file, 'rb') as audio_file:
-                        params = {
-                            "model": "whisper-1",
-                            "file": audio_file,
-                            "response_format": self.output_format
-                        }
-
-                        self._add_optional_params(params)
-                        response = client.audio.transcriptions.create(**params)
-
-                        text = response.text if hasattr(response, 'text') else str(response)
-                        if text:
-                            all_transcriptions.append(text)
-
-                        # 更新进度
-                        progress = 30 + (i + 1) * 60 // total_chunks
-                        self.progress_update.emit(progress)
-
-                except Exception as e:
-                    logger.error(f"转录分块 {i + 1} 失败: {e}")
-                    all_transcriptions.append(f"[第{i + 1}部分转录失败: {str(e)}]")
+                    timed_output.abort()
+                else:
+                    timestamp_files = timed_output.close()
+            if buffer_pool.spilled_count:
+                logger.info(f"超出内存预算，{buffer_pool.spilled_count} 个分段溢出到临时文件")
+            upload_bytes_saved = self._report_upload_bytes(split_stats)
+            final_text = merger.text()
 
-                finally:
-                    # 清理临时文件
-                    try:
-                        os.remove(chunk_file)
-                    except:
-                        pass
+            # 有分块失败时不缓存整个文件，下次只重新转录失败的分块
+            if cache_key and final_text and not failed_chunks and not self.is_cancelled:
+                self.cache.put(cache_key, final_text)
 
-            if not self.is_cancelled and all_transcriptions:
-                # 合并转录结果
-                final_text = "\n".join(all_transcriptions)
+            if not self.is_cancelled and final_text:
                 timestamp = time.strftime("%H:%M:%S")
                 metadata = {
                     'source': 'file_large_split',
                     'format': self.output_format,
                     'file_path': self.file_path,
                     'file_size': os.path.getsize(self.file_path),
-                    'chunks_count': total_chunks
+                    'chunks_count': total_chunks,
+                    'chunk_format': self.chunk_format,
+                    'upload_bytes': split_stats.get('encoded_bytes', 0),
+                    'upload_bytes_saved': upload_bytes_saved,
+                    'failed_chunks': failed_chunks,
+                    'timestamp_files': timestamp_files,
+                    'cached': False
                 }
 
                 self.transcription_ready.emit(final_text, timestamp, metadata)
@@ -2598,6 +4762,294 @@ class FileTranscriptionWorker(QThread):
             logger.error(error_msg)
             self.error_occurred.emit(error_msg)
 
+    def _report_upload_bytes(self, split_stats):
+        """记录分段上传字节数及相对按原格式导出WAV节省的字节数"""
+        try:
+            encoded = split_stats.get('encoded_bytes', 0)
+            saved = max(0, split_stats.get('source_pcm_bytes', 0) - encoded)
+            metrics.inc('file_upload_bytes_total', encoded)
+            metrics.inc('file_upload_bytes_saved_total', saved)
+            logger.info(f"{os.path.basename(self.file_path)}: 上传 {encoded / 1048576:.1f} MB"
+                        f"（{self.chunk_format}），比原格式WAV节省 {saved / 1048576:.1f} MB")
+            return saved
+        except Exception as e:
+            logger.error(f"统计上传字节数失败: {e}")
+            return 0
+
+    def _run_chunk_pipeline(self, client, chunks, merger, timed_output=None, split_stats=None):
+        """分割 → 上传 → 合并流水线，返回(分块数, 失败的分块数)
+
+        分割线程从chunks迭代器取出编码好的分段放入有界队列，max_concurrency个上传线程
+        取出转录，结果经有界队列交给当前线程按分块顺序送入merger
+        （以及按分块起始时间平移时间戳的timed_output）。
+        第N+1段编码时第N段在上传、第N-1段在合并，总耗时接近最慢的一级而不是各级之和。
+        各级耗时记录到file_stage_seconds直方图。
+        进度按分割器根据音频时长估算的分段数（split_stats['estimated_chunks']）计算。
+        合并级出错时流水线中止：各线程不再阻塞在队列上，未上传的分块直接释放。
+        """
+        workers = self.max_concurrency
+        chunk_queue = queue.Queue(maxsize=workers)
+        result_queue = queue.Queue(maxsize=workers * 2)
+        worker_done = object()
+        aborted = threading.Event()
+        stage_seconds = {'split': 0.0, 'upload': 0.0, 'merge': 0.0}
+        stage_lock = threading.Lock()
+        split_errors = []
+        produced = 0
+        failed = 0
+
+        def record(stage, elapsed):
+            with stage_lock:
+                stage_seconds[stage] += elapsed
+            metrics.observe('file_stage_seconds', elapsed, labels={'stage': stage})
+
+        def stopping():
+            return self.is_cancelled or aborted.is_set()
+
+        def put_result(item):
+            """放入结果队列，合并级已中止时放弃并返回False"""
+            while True:
+                try:
+                    result_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    if aborted.is_set():
+                        return False
+
+        def split_stage():
+            nonlocal produced
+            try:
+                iterator = iter(chunks)
+                while not stopping():
+                    start = time.perf_counter()
+                    chunk = next(iterator, None)
+                    if chunk is None:
+                        break
+                    record('split', time.perf_counter() - start)
+
+                    # 队列满时等待上传，取消时放弃
+                    while True:
+                        try:
+                            chunk_queue.put((produced, chunk), timeout=0.1)
+                            break
+                        except queue.Full:
+                            if stopping():
+                                chunk.release()
+                                return
+                    produced += 1
+            except Exception as e:
+                split_errors.append(e)
+            finally:
+                if hasattr(chunks, 'close'):
+                    chunks.close()
+                # 上传线程一直取到结束标记为止，这里的put不会永久阻塞
+                for _ in range(workers):
+                    chunk_queue.put(None)
+
+        def upload_stage():
+            nonlocal failed
+            try:
+                while True:
+                    item = chunk_queue.get()
+                    if item is None:
+                        break
+                    index, chunk = item
+                    if aborted.is_set():
+                        chunk.release()
+                        continue
+                    start = time.perf_counter()
+                    text = f"[第{index + 1}部分转录失败]"
+                    succeeded = False
+                    try:
+                        text = self._transcribe_chunk(client, index, chunk)
+                        succeeded = True
+                    except Exception as e:
+                        logger.error(f"转录分块 {index + 1} 失败: {e}")
+                        text = f"[第{index + 1}部分转录失败: {str(e)}]"
+                    finally:
+                        # 每个分块都必须有结果送到合并级，否则合并级会一直等待这个序号
+                        if not succeeded:
+                            with stage_lock:
+                                failed += 1
+                        put_result((index, text, chunk.start_ms))
+                        record('upload', time.perf_counter() - start)
+            finally:
+                put_result(worker_done)
+
+        pipeline_start = time.perf_counter()
+
+        split_thread = threading.Thread(target=split_stage, name="file-split", daemon=True)
+        split_thread.start()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-chunk")
+        try:
+            for _ in range(workers):
+                executor.submit(upload_stage)
+
+            # 合并级：乱序完成的结果先暂存，按分块顺序送入merger
+            finished_workers = 0
+            completed = 0
+            next_index = 0
+            waiting = {}
+            while finished_workers < workers:
+                item = result_queue.get()
+                if item is worker_done:
+                    finished_workers += 1
+                    continue
+
+                index, text, start_ms = item
+                waiting[index] = (text, start_ms)
+                completed += 1
+                # 估算在分割出第一段时写入，结果到达时一定已经可用
+                estimated_total = (split_stats or {}).get('estimated_chunks', 1)
+                total = max(estimated_total, produced, completed)
+                self.status_update.emit(f"📝 已完成 {completed}/{total} 部分...", "#00FF7F")
+                self.progress_update.emit(30 + completed * 60 // total)
+
+                start = time.perf_counter()
+                while next_index in waiting:
+                    text, start_ms = waiting.pop(next_index)
+                    if timed_output is not None:
+                        text = timed_output.add_chunk(text, start_ms)
+                    merger.add(text)
+                    next_index += 1
+                record('merge', time.perf_counter() - start)
+        except BaseException:
+            # 合并级不再消费结果，让分割和上传线程尽快退出，避免shutdown永久等待
+            aborted.set()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            split_thread.join()
+
+        if split_errors:
+            raise split_errors[0]
+
+        wall = time.perf_counter() - pipeline_start
+        logger.info(f"分块流水线 {produced} 段，总耗时 {wall:.1f}s：分割 {stage_seconds['split']:.1f}s，"
+                    f"上传 {stage_seconds['upload']:.1f}s（{workers}路并发），合并 {stage_seconds['merge']:.2f}s")
+        return produced, failed
+
+    def _transcribe_chunk(self, client, index, chunk):
+        """转录单个分块 - 先查任务日志和缓存，直接从内存缓冲区上传，失败时指数退避重试"""
+        try:
+            if self.journal is not None:
+                text = self.journal.chunk_result(self.file_path, index)
+                if text is not None:
+                    return text
+
+            cache_key, text = self._cache_lookup('chunk', chunk)
+            if text is not None:
+                return text
+
+            for attempt in range(self.max_retries + 1):
+                if self.is_cancelled:
+                    return None
+                try:
+                    params = {
+                        "model": "whisper-1",
+                        "file": chunk.upload_file(),
+                        "response_format": self.request_format
+                    }
+                    self._add_optional_params(params)
+                    response = self._request_transcription(client, params)
+                    if response is None:
+                        return None
+                    text = self._response_payload(response)
+                    if text and cache_key:
+                        self.cache.put(cache_key, text)
+                    if text and self.journal is not None:
+                        self.journal.record_chunk(self.file_path, index, text)
+                    return text
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self.retry_backoff * (2 ** attempt)
+                    logger.warning(f"转录分块 {index + 1} 第{attempt + 1}次失败，{delay:.0f}秒后重试: {e}")
+                    if self._cancel_event.wait(delay):
+                        return None
+        finally:
+            chunk.release()
+
+    def _request_transcription(self, client, params):
+        """发起转录请求并等待结果，取消时立即返回None
+
+        请求在后台守护线程中进行，进行中的HTTP请求无法中断，取消后不再等待，其结果被丢弃，
+        工作线程因此能在取消后及时退出。
+        """
+        done = threading.Event()
+        outcome = {}
+
+        def request():
+            try:
+                with self.api_slots:
+                    if not self._cancel_event.is_set():
+                        outcome['response'] = client.audio.transcriptions.create(**params)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=request, name="file-request", daemon=True).start()
+        while not done.wait(0.1):
+            if self._cancel_event.is_set():
+                return None
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('response')
+
+    def _open_cache(self):
+        """按配置打开共享的转录结果缓存，关闭或失败时返回None"""
+        try:
+            if not self.config.get('transcript_cache_enabled', True):
+                return None
+            cache_dir = self.config.get('transcript_cache_dir') or os.path.join(os.path.expanduser("~"),
+                                                                                ".openai_asr_cache")
+            max_bytes = int(self.config.get('transcript_cache_max_mb', 512)) * 1024 * 1024
+            return TranscriptCache.shared(cache_dir, max_bytes)
+        except Exception as e:
+            logger.error(f"打开转录缓存失败: {e}")
+            return None
+
+    def _response_payload(self, response):
+        """接口返回的结果：verbose_json保留完整JSON（含分段时间戳），其他格式取文本"""
+        if self.request_format == 'verbose_json' and hasattr(response, 'model_dump_json'):
+            return response.model_dump_json()
+        return response.text if hasattr(response, 'text') else str(response)
+
+    def _open_timed_output(self):
+        """创建时间戳输出，文件名为timestamp_output_base或音频文件名加各格式扩展名"""
+        output_base = self.timestamp_output_base or os.path.splitext(self.file_path)[0]
+        return TimedTranscriptAssembler(output_base, self.timestamp_formats, self.chunk_overlap_ms)
+
+    def result_params(self, split=False):
+        """影响转录结果的参数（模型、输出格式、语言、提示词），split为True时加上分割参数"""
+        params = {"model": "whisper-1", "response_format": self.request_format}
+        self._add_optional_params(params)
+        if split:
+            params.update({'max_size_mb': self.max_file_size_mb, 'overlap_ms': self.chunk_overlap_ms,
+                           'chunk_format': self.chunk_format})
+        return params
+
+    def _cache_lookup(self, level, source, split=False):
+        """查询缓存，source为文件路径或AudioChunk，返回(缓存键, 命中的结果或None)
+
+        缓存关闭时返回(None, None)。键包含result_params，大文件整体结果还包含分割参数。
+        """
+        try:
+            if self.cache is None:
+                return None, None
+            digest = source.sha256() if isinstance(source, AudioChunk) else TranscriptCache.file_digest(source)
+            key = TranscriptCache.make_key(digest, self.result_params(split))
+            text = self.cache.get(key)
+            if text is None:
+                metrics.inc('transcript_cache_misses_total', labels={'level': level})
+            else:
+                metrics.inc('transcript_cache_hits_total', labels={'level': level})
+            return key, text
+        except Exception as e:
+            logger.error(f"查询转录缓存失败: {e}")
+            return None, None
+
     def _add_optional_params(self, params):
         """添加可选参数"""
         try:
@@ -2607,6 +5059,9 @@ class FileTranscriptionWorker(QThread):
             prompt = self._build_hotwords_prompt()
             if prompt:
                 params["prompt"] = prompt
+
+            if self.request_format == 'verbose_json':
+                params["timestamp_granularities"] = ["segment"]
         except Exception as e:
             logger.error(f"添加可选参数失败: {e}")
 
@@ -2633,6 +5088,271 @@ class FileTranscriptionWorker(QThread):
     def cancel(self):
         """取消转录"""
         self.is_cancelled = True
+        self._cancel_event.set()
+
+
+class BatchJournal:
+    """批量转录任务日志 - SQLite记录每个文件和每个分块的状态，崩溃或重启后从中断处继续
+
+    文件大小、修改时间或转录参数变化时，该文件的记录作废重新转录。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, size INTEGER, mtime REAL, settings TEXT,
+            status TEXT, output_path TEXT, error TEXT, updated_at REAL)""")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS chunks (
+            path TEXT, chunk_index INTEGER, text TEXT, PRIMARY KEY (path, chunk_index))""")
+        # 上次没有正常结束的文件重新排队，已完成的分块保留
+        self._conn.execute("UPDATE files SET status = 'pending' WHERE status = 'running'")
+
+    def add_files(self, paths, settings):
+        """登记文件，返回尚未完成的文件（按输入顺序）"""
+        settings_json = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+        todo = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for path in paths:
+                    stat = os.stat(path)
+                    row = self._conn.execute("SELECT size, mtime, settings, status FROM files WHERE path = ?",
+                                             (path,)).fetchone()
+                    if row is None or (row[0], row[1], row[2]) != (stat.st_size, stat.st_mtime, settings_json):
+                        self._conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO files (path, size, mtime, settings, status, updated_at) "
+                            "VALUES (?, ?, ?, ?, 'pending', ?)",
+                            (path, stat.st_size, stat.st_mtime, settings_json, time.time()))
+                        todo.append(path)
+                    elif row[3] != 'done':
+                        todo.append(path)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return todo
+
+    def mark_file(self, path, status, output_path=None, error=None):
+        with self._lock:
+            self._conn.execute("UPDATE files SET status = ?, output_path = ?, error = ?, updated_at = ? "
+                               "WHERE path = ?", (status, output_path, error, time.time(), path))
+
+    def chunk_result(self, path, index):
+        """已完成分块的结果，没有时返回None"""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM chunks WHERE path = ? AND chunk_index = ?",
+                                     (path, index)).fetchone()
+        return row[0] if row else None
+
+    def record_chunk(self, path, index, text):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO chunks (path, chunk_index, text) VALUES (?, ?, ?)",
+                               (path, index, text))
+
+    def summary(self, paths=None):
+        """按状态统计文件数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, status FROM files").fetchall()
+        wanted = set(paths) if paths is not None else None
+        counts = {}
+        for path, status in rows:
+            if wanted is None or path in wanted:
+                counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BatchTranscriptionRunner(QThread):
+    """批量转录 - 文件夹/通配符展开为任务，按任务日志断点续传，全局限制同时进行的转录请求数"""
+
+    progress_update = pyqtSignal(int)
+    status_update = pyqtSignal(str, str)
+    file_finished = pyqtSignal(str, str)  # path, status
+    error_occurred = pyqtSignal(str)
+
+    AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.mp4', '.mpeg', '.mpga', '.webm', '.flac', '.aac')
+
+    def __init__(self, inputs, config, journal_path=None, output_dir=None):
+        super().__init__()
+        self.inputs = list(inputs)
+        self.config = config
+        self.journal_path = (journal_path or config.get('batch_journal_path') or
+                             os.path.join(os.path.expanduser("~"), ".openai_asr_batch.sqlite3"))
+        self.output_dir = output_dir or config.get('batch_output_dir') or None
+        self.max_requests = max(1, int(config.get('batch_max_requests', 8)))  # 所有文件合计
+        self.parallel_files = max(1, int(config.get('batch_parallel_files', 2)))  # 一个文件解码时另一个在上传
+        self.input_root = None  # 所有输入文件的公共目录，输出目录下按相对路径保存
+        self.is_cancelled = False
+        self.active_workers = set()
+        self._workers_lock = threading.Lock()
+
+    @staticmethod
+    def expand_inputs(inputs):
+        """展开文件夹（递归）、通配符和文件路径为去重后的音频文件列表"""
+        found = []
+        for item in inputs:
+            if os.path.isdir(item):
+                for root, _, names in os.walk(item):
+                    found.extend(os.path.join(root, name) for name in names)
+            elif os.path.isfile(item):
+                found.append(item)
+            else:
+                found.extend(glob.glob(item, recursive=True))
+
+        files = []
+        seen = set()
+        for path in found:
+            path = os.path.abspath(path)
+            if (path not in seen and os.path.isfile(path) and
+                    path.lower().endswith(BatchTranscriptionRunner.AUDIO_EXTENSIONS)):
+                seen.add(path)
+                files.append(path)
+        return sorted(files)
+
+    def run(self):
+        """执行批量转录"""
+        journal = None
+        try:
+            files = self.expand_inputs(self.inputs)
+            if not files:
+                self.error_occurred.emit("批量转录: 没有找到音频文件")
+                return
+            self.input_root = self.common_root(files)
+
+            journal = BatchJournal(self.journal_path)
+            settings = FileTranscriptionWorker(None, self.config).result_params(split=True)
+            todo = journal.add_files(files, settings)
+            total = len(files)
+            finished = total - len(todo)
+            if finished:
+                logger.info(f"批量转录: 任务日志中已完成 {finished}/{total} 个文件，跳过")
+            self.progress_update.emit(finished * 100 // total)
+
+            api_semaphore = threading.BoundedSemaphore(self.max_requests)
+            executor = ThreadPoolExecutor(max_workers=self.parallel_files, thread_name_prefix="batch-file")
+            try:
+                futures = [executor.submit(self._process_file, path, journal, api_semaphore) for path in todo]
+                for future in as_completed(futures):
+                    path, status = future.result()
+                    finished += 1
+                    self.file_finished.emit(path, status)
+                    self.status_update.emit(f"🗂 批量转录 {finished}/{total}: {os.path.basename(path)}", "#00FF7F")
+                    self.progress_update.emit(finished * 100 // total)
+            except KeyboardInterrupt:
+                # 命令行模式下中断：先取消进行中的文件再等待线程池退出
+                self.cancel()
+                raise
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            counts = journal.summary(files)
+            logger.info(f"批量转录结束: 完成 {counts.get('done', 0)}，失败 {counts.get('failed', 0)}，"
+                        f"待处理 {counts.get('pending', 0)}，共 {total}")
+            if counts.get('failed'):
+                self.status_update.emit(f"⚠️ 批量转录: {counts['failed']} 个文件失败，重新运行可继续", "#FFD700")
+            elif not self.is_cancelled:
+                self.status_update.emit(f"✅ 批量转录完成: {total} 个文件", "#00FF7F")
+
+        except Exception as e:
+            error_msg = f"批量转录失败: {str(e)}"
+            logger.error(error_msg)
+            self.error_occurred.emit(error_msg)
+        finally:
+            if journal is not None:
+                journal.close()
+
+    def _process_file(self, path, journal, api_semaphore):
+        """在线程池线程中同步转录一个文件，结果写入输出文件并更新任务日志"""
+        if self.is_cancelled:
+            return path, 'pending'
+
+        results = []
+        errors = []
+        worker = FileTranscriptionWorker(path, self.config, 'text', api_semaphore=api_semaphore, journal=journal)
+        worker.timestamp_output_base = os.path.splitext(self._output_path(path))[0]
+        worker.transcription_ready.connect(lambda text, timestamp, metadata: results.append((text, metadata)))
+        worker.error_occurred.connect(errors.append)
+
+        with self._workers_lock:
+            self.active_workers.add(worker)
+            if self.is_cancelled:
+                worker.cancel()
+        journal.mark_file(path, 'running')
+        try:
+            worker.run()
+        finally:
+            with self._workers_lock:
+                self.active_workers.discard(worker)
+
+        try:
+            if self.is_cancelled:
+                journal.mark_file(path, 'pending')
+                return path, 'pending'
+            if errors:
+                journal.mark_file(path, 'failed', error=errors[0])
+                return path, 'failed'
+
+            # 静音等识别结果为空的文件不发出结果，同样视为完成并写入空文件
+            text, metadata = results[0] if results else ("", {})
+            if metadata.get('failed_chunks'):
+                # 成功的分块已记录在日志中，重新运行只转录失败的分块
+                journal.mark_file(path, 'failed', error=f"{metadata['failed_chunks']} 个分块失败")
+                return path, 'failed'
+
+            output_path = self._output_path(path)
+            temp_path = output_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, output_path)
+            journal.mark_file(path, 'done', output_path=output_path)
+            return path, 'done'
+        except Exception as e:
+            logger.error(f"保存批量转录结果失败 {path}: {e}")
+            journal.mark_file(path, 'failed', error=str(e))
+            return path, 'failed'
+
+    @staticmethod
+    def common_root(files):
+        """所有文件的公共目录，不在同一盘符时返回None"""
+        try:
+            return os.path.commonpath([os.path.dirname(path) for path in files])
+        except ValueError:
+            return None
+
+    def _output_path(self, path):
+        """输出文件路径：保留完整文件名加.txt（talk.wav与talk.flac不会互相覆盖），
+        指定输出目录时按相对公共目录的路径存放，避免不同子目录的同名文件冲突"""
+        name = os.path.basename(path) + '.txt'
+        if not self.output_dir:
+            return os.path.join(os.path.dirname(path), name)
+
+        if self.input_root:
+            relative_dir = os.path.relpath(os.path.dirname(path), self.input_root)
+        else:
+            # 不同盘符时以盘符区分
+            drive, directory = os.path.splitdrive(os.path.dirname(path))
+            drive_name = drive.replace(':', '').strip('\\/').replace('\\', '_').replace('/', '_')
+            relative_dir = os.path.join(drive_name, directory.lstrip('\\/'))
+        output_dir = os.path.normpath(os.path.join(self.output_dir, relative_dir))
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, name)
+
+    def cancel(self):
+        """取消批量转录，进行中的文件保持待处理状态"""
+        self.is_cancelled = True
+        with self._workers_lock:
+            for worker in self.active_workers:
+                worker.cancel()
 
 
 class UltraRealtimeSubtitleApp(QMainWindow):
@@ -2654,6 +5374,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
 
         self.transcription_thread = None
         self.file_transcription_worker = None
+        self.batch_runner = None
         self.subtitle_history = deque(maxlen=5000)
         self.current_config = self._get_default_config()
         self.audio_devices = []
@@ -2662,10 +5383,28 @@ class UltraRealtimeSubtitleApp(QMainWindow):
         self.total_chars = 0
         self.session_start_time = None
 
+        # 指标端点
+        self.metrics_server = None
+        metrics_port = self.saved_config.get('metrics_port', 0)
+        if metrics_port:
+            self.metrics_server = MetricsHttpServer(
+                metrics, self.saved_config.get('metrics_host', '127.0.0.1'), metrics_port)
+            self.metrics_server.start()
+
         # 异常处理
         self.error_count = 0
         self.max_errors = 10
 
+        # 周期性界面更新只写入变化的值
+        self.ui_binder = WidgetStateBinder()
+
+        # 所有周期性界面工作共用一个帧调度器，空闲和窗口隐藏时不产生唤醒
+        self.frame_scheduler = FrameScheduler(self, profiler=ui_profiler)
+
+        # 界面线程卡顿检测
+        ui_profiler.stall_threshold = self.saved_config.get('stall_threshold_ms', 100) / 1000.0
+        ui_profiler.start()
+
         # 设置异常处理器
         sys.excepthook = self._handle_exception
 
@@ -2707,6 +5446,10 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 font.setPointSize(self.saved_config['font_size'])
                 self.typewriter_display.setFont(font)
 
+            # 应用频谱图显示
+            if hasattr(self, 'spectrogram_checkbox'):
+                self.spectrogram_checkbox.setChecked(self.saved_config.get('show_spectrogram', False))
+
             # 应用界面语言设置
             if hasattr(self, 'ui_language_combo'):
                 for i in range(self.ui_language_combo.count()):
@@ -2720,7 +5463,9 @@ class UltraRealtimeSubtitleApp(QMainWindow):
     def _save_current_config(self):
         """保存当前配置"""
         try:
-            config_to_save = {
+            # 保留界面之外的配置项（指标端点、轨迹目录等）
+            config_to_save = dict(self.saved_config)
+            config_to_save.update({
                 'ui_language': self.lang_manager.current_language,
                 'api_key': getattr(self, 'api_key_input', None) and self.api_key_input.text().strip() or '',
                 'base_url': getattr(self, 'base_url_input',
@@ -2733,10 +5478,13 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                                                                       self.hotwords_text.toPlainText().split('\n') if
                                                                       line.strip()] or [],
                 'font_size': getattr(self, 'typewriter_display',
-                                     None) and self.typewriter_display.font().pointSize() or 18
-            }
+                                     None) and self.typewriter_display.font().pointSize() or 18,
+                'show_spectrogram': getattr(self, 'spectrogram_checkbox',
+                                            None) and self.spectrogram_checkbox.isChecked() or False
+            })
 
             self.config_manager.save_config(config_to_save)
+            self.saved_config = config_to_save
         except Exception as e:
             logger.error(f"保存配置失败: {e}")
 
@@ -2791,7 +5539,8 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             'audio_filter_enabled': True,
             'noise_gate_enabled': True,
             'noise_reduction_level': 0.3,
-            'typewriter_speed_ms': 12
+            'typewriter_speed_ms': 12,
+            'typewriter_target_lag_ms': 300
         }
 
     def init_ui(self):
@@ -3416,6 +6165,11 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             self.debug_mode_checkbox.stateChanged.connect(self._update_config)
             debug_layout.addWidget(self.debug_mode_checkbox)
 
+            self.record_trace_checkbox = QCheckBox(self.lang_manager.get_text('checkbox_record_trace'))
+            self.record_trace_checkbox.setChecked(False)
+            self.record_trace_checkbox.stateChanged.connect(self._update_config)
+            debug_layout.addWidget(self.record_trace_checkbox)
+
             self.debug_group.setLayout(debug_layout)
             layout.addWidget(self.debug_group)
 
@@ -3522,13 +6276,27 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             wave_layout = QVBoxLayout()
             wave_layout.setContentsMargins(5, 5, 5, 5)
 
+            wave_header_layout = QHBoxLayout()
             self.wave_label = QLabel(self.lang_manager.get_text('audio_waveform'))
             self.wave_label.setStyleSheet("color: #CCCCCC; font-size: 12px; font-weight: bold;")
-            wave_layout.addWidget(self.wave_label)
+            wave_header_layout.addWidget(self.wave_label)
+            wave_header_layout.addStretch()
+
+            self.spectrogram_checkbox = QCheckBox(self.lang_manager.get_text('checkbox_spectrogram'))
+            self.spectrogram_checkbox.setStyleSheet("color: #CCCCCC; font-size: 11px;")
+            self.spectrogram_checkbox.setChecked(False)
+            self.spectrogram_checkbox.toggled.connect(self._toggle_spectrogram)
+            wave_header_layout.addWidget(self.spectrogram_checkbox)
+            wave_layout.addLayout(wave_header_layout)
 
-            self.audio_visualizer = CompactAudioVisualizer()
+            self.audio_visualizer = CompactAudioVisualizer(self.frame_scheduler)
             wave_layout.addWidget(self.audio_visualizer)
 
+            # 可选的滚动频谱图
+            self.spectrogram_view = SpectrogramWidget(self.frame_scheduler)
+            self.spectrogram_view.setVisible(False)
+            wave_layout.addWidget(self.spectrogram_view)
+
             wave_container.setLayout(wave_layout)
             audio_layout.addWidget(wave_container, 4)
 
@@ -3544,7 +6312,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
 
             volume_content_layout = QHBoxLayout()
 
-            self.volume_indicator = CompactVolumeIndicator()
+            self.volume_indicator = CompactVolumeIndicator(self.frame_scheduler)
             volume_content_layout.addWidget(self.volume_indicator)
 
             # 音量信息
@@ -3598,10 +6366,8 @@ class UltraRealtimeSubtitleApp(QMainWindow):
 
             layout.addLayout(audio_layout)
 
-            # 更新定时器
-            self.update_timer = QTimer()
-            self.update_timer.timeout.connect(self._update_displays)
-            self.update_timer.start(50)
+            # 显示信息帧任务 - 转录期间每50ms刷新，停止后进入空闲
+            self.frame_scheduler.register('displays', self._update_displays, 50, active=True)
 
             panel.setLayout(layout)
             return panel
@@ -3637,6 +6403,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             self.auto_scroll_btn.setCheckable(True)
             self.auto_scroll_btn.setChecked(True)
             self.auto_scroll_btn.setMaximumWidth(120)
+            self.auto_scroll_btn.toggled.connect(self._toggle_auto_scroll)
             header_layout.addWidget(self.auto_scroll_btn)
 
             self.font_size_btn = QPushButton(self.lang_manager.get_text('btn_font'))
@@ -3663,7 +6430,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
 
             status_layout.addStretch()
 
-            self.delay_indicator = QLabel(f"{self.lang_manager.get_text('subtitle_delay')}: <20ms")
+            self.delay_indicator = QLabel(f"{self.lang_manager.get_text('subtitle_delay')}: 0ms")
             self.delay_indicator.setStyleSheet("color: #888888; font-size: 13px; font-weight: bold;")
             status_layout.addWidget(self.delay_indicator)
 
@@ -3674,9 +6441,15 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             layout.addLayout(status_layout)
 
             # 实时打字机显示组件
-            self.typewriter_display = TypewriterDisplayWidget()
+            self.typewriter_display = TypewriterDisplayWidget(self.frame_scheduler)
+            self.typewriter_display.pacer.char_interval_ms = self.current_config['typewriter_speed_ms']
+            self.typewriter_display.pacer.target_lag = self.saved_config.get(
+                'typewriter_target_lag_ms', self.current_config['typewriter_target_lag_ms']) / 1000.0
             layout.addWidget(self.typewriter_display)
 
+            self.search_shortcut = QShortcut(QKeySequence.Find, self)
+            self.search_shortcut.activated.connect(self._search_transcription)
+
             # 底部信息栏
             info_layout = QHBoxLayout()
 
@@ -3811,6 +6584,11 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             self.settings_button.clicked.connect(self._open_settings)
             function_layout.addWidget(self.settings_button, 1, 2)
 
+            self.batch_button = QPushButton(self.lang_manager.get_text('btn_batch'))
+            self.batch_button.setStyleSheet(button_style)
+            self.batch_button.clicked.connect(self.load_audio_folder)
+            function_layout.addWidget(self.batch_button, 2, 0, 1, 3)
+
             button_layout.addLayout(function_layout)
 
             # 进度条 - 优化颜色
@@ -3879,6 +6657,20 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 font-family: 'Consolas', monospace;
             """)
             layout.addWidget(self.debug_label)
+
+            # 界面线程耗时与卡顿
+            self.stall_overlay_label = QLabel(f"{self.lang_manager.get_text('debug_ui_stalls')}: 0")
+            self.stall_overlay_label.setWordWrap(True)
+            self.stall_overlay_label.setStyleSheet("""
+                background: #2a2a2a; 
+                color: #FF6B6B; 
+                padding: 6px 10px; 
+                border: 1px solid #FF6B6B; 
+                border-radius: 8px;
+                font-size: 11px;
+                font-family: 'Consolas', monospace;
+            """)
+            layout.addWidget(self.stall_overlay_label)
         except Exception as e:
             logger.error(f"添加状态指示器失败: {e}")
 
@@ -4034,6 +6826,10 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 self.debug_group.setTitle(self.lang_manager.get_text('group_debug'))
             if hasattr(self, 'debug_mode_checkbox'):
                 self.debug_mode_checkbox.setText(self.lang_manager.get_text('checkbox_debug_mode'))
+            if hasattr(self, 'record_trace_checkbox'):
+                self.record_trace_checkbox.setText(self.lang_manager.get_text('checkbox_record_trace'))
+            if hasattr(self, 'spectrogram_checkbox'):
+                self.spectrogram_checkbox.setText(self.lang_manager.get_text('checkbox_spectrogram'))
 
             # 更新控制按钮
             if hasattr(self, 'start_button'):
@@ -4052,6 +6848,8 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 self.export_button.setText(self.lang_manager.get_text('btn_export'))
             if hasattr(self, 'settings_button'):
                 self.settings_button.setText(self.lang_manager.get_text('btn_settings'))
+            if hasattr(self, 'batch_button'):
+                self.batch_button.setText(self.lang_manager.get_text('btn_batch'))
 
             # 更新音频监控面板
             if hasattr(self, 'audio_title'):
@@ -4153,8 +6951,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             if hasattr(self, 'word_count_label'):
                 word_count = 0
                 if hasattr(self, 'typewriter_display'):
-                    text_content = self.typewriter_display.toPlainText()
-                    word_count = len(text_content.replace('\n', '').replace(' ', ''))
+                    word_count = self.typewriter_display.char_count
                 self.word_count_label.setText(f"{self.lang_manager.get_text('subtitle_word_count')}: {word_count}")
 
             if hasattr(self, 'typewriter_count_label'):
@@ -4164,8 +6961,13 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 self.typewriter_count_label.setText(
                     f"{self.lang_manager.get_text('subtitle_active_items')}: {typewriter_count}")
 
-            if hasattr(self, 'delay_indicator'):
-                self.delay_indicator.setText(f"{self.lang_manager.get_text('subtitle_delay')}: <20ms")
+            if hasattr(self, 'delay_indicator') and hasattr(self, 'typewriter_display'):
+                lag_ms = int(self.typewriter_display.display_lag * 1000)
+                self.delay_indicator.setText(f"{self.lang_manager.get_text('subtitle_delay')}: {lag_ms}ms")
+
+            # 语言切换后强制刷新周期性更新的标签
+            self.ui_binder.invalidate()
+            self._request_display_update()
 
         except Exception as e:
             logger.error(f"更新数值标签失败: {e}")
@@ -4215,6 +7017,23 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                                               None) and self.aggressive_cleanup_checkbox.isChecked() or True,
                 'debug_mode': getattr(self, 'debug_mode_checkbox',
                                       None) and self.debug_mode_checkbox.isChecked() or False,
+                'trace_enabled': getattr(self, 'record_trace_checkbox',
+                                         None) and self.record_trace_checkbox.isChecked() or False,
+                'trace_dir': self.saved_config.get('trace_dir', ''),
+                'trace_store_audio': self.saved_config.get('trace_store_audio', False),
+                'file_concurrency': self.saved_config.get('file_concurrency', 4),
+                'file_max_retries': self.saved_config.get('file_max_retries', 3),
+                'file_chunk_overlap_ms': self.saved_config.get('file_chunk_overlap_ms', 0),
+                'file_chunk_format': self.saved_config.get('file_chunk_format', 'flac'),
+                'file_memory_budget_mb': self.saved_config.get('file_memory_budget_mb', 256),
+                'transcript_cache_enabled': self.saved_config.get('transcript_cache_enabled', True),
+                'transcript_cache_dir': self.saved_config.get('transcript_cache_dir', ''),
+                'transcript_cache_max_mb': self.saved_config.get('transcript_cache_max_mb', 512),
+                'batch_journal_path': self.saved_config.get('batch_journal_path', ''),
+                'batch_output_dir': self.saved_config.get('batch_output_dir', ''),
+                'batch_max_requests': self.saved_config.get('batch_max_requests', 8),
+                'batch_parallel_files': self.saved_config.get('batch_parallel_files', 2),
+                'file_timestamp_formats': self.saved_config.get('file_timestamp_formats', []),
                 'output_format': 'text'
             })
         except Exception as e:
@@ -4267,10 +7086,9 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             if hasattr(self, 'typewriter_speed_display_label'):
                 self.typewriter_speed_display_label.setText(f"{value}{self.lang_manager.get_text('unit_ms_per_char')}")
 
-            # 更新打字机定时器
+            # 更新打字机空闲节奏
             if hasattr(self, 'typewriter_display'):
-                self.typewriter_display.typewriter_timer.stop()
-                self.typewriter_display.typewriter_timer.start(value)
+                self.typewriter_display.pacer.char_interval_ms = value
         except Exception as e:
             logger.error(f"更新打字机速度失败: {e}")
 
@@ -4319,31 +7137,32 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             logger.error(f"更新热词配置失败: {e}")
 
     def _update_displays(self):
-        """更新显示信息"""
+        """更新显示信息 - 使用增量统计，只更新发生变化的控件，返回是否需要继续刷新"""
         try:
+            binder = self.ui_binder
+            get_text = self.lang_manager.get_text
+
             # 更新音量显示
             if hasattr(self, 'volume_indicator') and self.volume_indicator:
                 volume_percent = int(self.volume_indicator.volume_level * 100)
                 peak_percent = int(self.volume_indicator.peak_level * 100)
 
-                if hasattr(self, 'volume_level_label'):
-                    self.volume_level_label.setText(f"{volume_percent}%")
-                if hasattr(self, 'peak_level_label'):
-                    self.peak_level_label.setText(f"{self.lang_manager.get_text('audio_peak')}: {peak_percent}%")
+                binder.set_text(getattr(self, 'volume_level_label', None), f"{volume_percent}%")
+                binder.set_text(getattr(self, 'peak_level_label', None), f"{get_text('audio_peak')}: {peak_percent}%")
 
                 if volume_percent < 3:
-                    noise_level = self.lang_manager.get_text('audio_quiet')
+                    noise_level = get_text('audio_quiet')
                     noise_color = "#00FF7F"
                 elif volume_percent < 15:
-                    noise_level = self.lang_manager.get_text('audio_normal')
+                    noise_level = get_text('audio_normal')
                     noise_color = "#FFD700"
                 else:
-                    noise_level = self.lang_manager.get_text('audio_noisy')
+                    noise_level = get_text('audio_noisy')
                     noise_color = "#FF4545"
 
-                if hasattr(self, 'noise_level_label'):
-                    self.noise_level_label.setText(noise_level)
-                    self.noise_level_label.setStyleSheet(f"font-size: 10px; color: {noise_color};")
+                noise_label = getattr(self, 'noise_level_label', None)
+                binder.set_text(noise_label, noise_level)
+                binder.set_style(noise_label, f"font-size: 10px; color: {noise_color};")
 
             # 更新会话统计
             if self.session_start_time:
@@ -4352,53 +7171,86 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 minutes = int((elapsed % 3600) // 60)
                 seconds = int(elapsed % 60)
 
-                if hasattr(self, 'session_time_label'):
-                    self.session_time_label.setText(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-                if hasattr(self, 'total_chars_label'):
-                    self.total_chars_label.setText(f"{self.lang_manager.get_text('audio_chars')}: {self.total_chars}")
+                binder.set_text(getattr(self, 'session_time_label', None), f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+                binder.set_text(getattr(self, 'total_chars_label', None), f"{get_text('audio_chars')}: {self.total_chars}")
 
                 if elapsed > 0:
                     chars_per_minute = int((self.total_chars * 60) / elapsed)
-                    if hasattr(self, 'avg_speed_label'):
-                        self.avg_speed_label.setText(
-                            f"{chars_per_minute} {self.lang_manager.get_text('unit_chars_per_min')}")
+                    binder.set_text(getattr(self, 'avg_speed_label', None),
+                                    f"{chars_per_minute} {get_text('unit_chars_per_min')}")
 
             # 更新调试信息
             if self.transcription_thread:
                 audio_sent = getattr(self.transcription_thread, 'audio_chunks_sent', 0)
                 msgs_received = getattr(self.transcription_thread, 'messages_received', 0)
-                if hasattr(self, 'debug_label'):
-                    self.debug_label.setText(f"音频块:{audio_sent} 消息:{msgs_received}")
+                binder.set_text(getattr(self, 'debug_label', None), f"音频块:{audio_sent} 消息:{msgs_received}")
 
-            # 更新字数统计
+            # 界面线程耗时概览
+            overlay = [f"{get_text('debug_ui_stalls')}: {ui_profiler.stall_count} "
+                       f"({get_text('debug_longest')} {ui_profiler.longest_stall * 1000:.0f}ms)"]
+            for name, p95, worst, _count in ui_profiler.handler_summary():
+                overlay.append(f"{name} p95 {p95 * 1000:.1f}ms max {worst * 1000:.1f}ms")
+            binder.set_text(getattr(self, 'stall_overlay_label', None), "\n".join(overlay))
+
+            # 更新字数统计（增量维护，不再扫描整个文档）
             if hasattr(self, 'typewriter_display'):
-                text_content = self.typewriter_display.toPlainText()
-                word_count = len(text_content.replace('\n', '').replace(' ', ''))
-                if hasattr(self, 'word_count_label'):
-                    self.word_count_label.setText(f"{self.lang_manager.get_text('subtitle_word_count')}: {word_count}")
+                binder.set_text(getattr(self, 'word_count_label', None),
+                                f"{get_text('subtitle_word_count')}: {self.typewriter_display.char_count}")
 
                 # 更新活跃项目计数
                 typewriter_count = len(self.typewriter_display.typewriter_items)
-                if hasattr(self, 'typewriter_count_label'):
-                    self.typewriter_count_label.setText(
-                        f"{self.lang_manager.get_text('subtitle_active_items')}: {typewriter_count}")
+                metrics.set_gauge('typewriter_active_items', typewriter_count)
+                binder.set_text(getattr(self, 'typewriter_count_label', None),
+                                f"{get_text('subtitle_active_items')}: {typewriter_count}")
+
+                # 实测显示延迟
+                lag_ms = int(self.typewriter_display.display_lag * 1000)
+                binder.set_text(getattr(self, 'delay_indicator', None), f"{get_text('subtitle_delay')}: {lag_ms}ms")
 
-                # 动态延迟显示
+                typing_indicator = getattr(self, 'typing_indicator', None)
                 if typewriter_count > 0:
-                    if hasattr(self, 'delay_indicator'):
-                        self.delay_indicator.setText(f"{self.lang_manager.get_text('subtitle_delay')}: <15ms")
-                    if hasattr(self, 'typing_indicator'):
-                        self.typing_indicator.setText(self.lang_manager.get_text('indicator_typing'))
-                        self.typing_indicator.setStyleSheet("color: #00FF7F; font-size: 13px; font-weight: bold;")
+                    binder.set_text(typing_indicator, get_text('indicator_typing'))
+                    binder.set_style(typing_indicator, "color: #00FF7F; font-size: 13px; font-weight: bold;")
                 else:
-                    if hasattr(self, 'delay_indicator'):
-                        self.delay_indicator.setText(f"{self.lang_manager.get_text('subtitle_delay')}: <20ms")
-                    if hasattr(self, 'typing_indicator'):
-                        self.typing_indicator.setText(self.lang_manager.get_text('indicator_waiting'))
-                        self.typing_indicator.setStyleSheet("color: #888888; font-size: 13px; font-weight: bold;")
+                    binder.set_text(typing_indicator, get_text('indicator_waiting'))
+                    binder.set_style(typing_indicator, "color: #888888; font-size: 13px; font-weight: bold;")
+
+            # 会话计时只在转录进行时变化
+            return self.transcription_thread is not None
 
         except Exception as e:
             logger.error(f"更新显示信息失败: {e}")
+            return False
+
+    def _request_display_update(self):
+        """请求刷新显示信息"""
+        if hasattr(self, 'frame_scheduler'):
+            self.frame_scheduler.wake('displays')
+
+    def _update_scheduler_visibility(self):
+        """窗口隐藏或最小化时暂停帧调度"""
+        try:
+            if hasattr(self, 'frame_scheduler'):
+                self.frame_scheduler.set_paused(not self.isVisible() or self.isMinimized())
+        except Exception as e:
+            logger.error(f"更新帧调度状态失败: {e}")
+
+    def showEvent(self, event):
+        """窗口显示事件"""
+        super().showEvent(event)
+        self._update_scheduler_visibility()
+
+    def hideEvent(self, event):
+        """窗口隐藏事件"""
+        super().hideEvent(event)
+        if hasattr(self, 'frame_scheduler'):
+            self.frame_scheduler.set_paused(True)
+
+    def changeEvent(self, event):
+        """窗口状态变化事件"""
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self._update_scheduler_visibility()
 
     def start_transcription(self):
         """开始实时转录"""
@@ -4442,19 +7294,18 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             # 启动音频可视化
             if hasattr(self, 'audio_visualizer') and self.audio_visualizer:
                 self.audio_visualizer.start_recording()
+            if hasattr(self, 'spectrogram_view'):
+                self.spectrogram_view.clear()
 
             # 创建实时转录线程
             self.transcription_thread = UltraRealtimeTranscriber(self.current_config)
             if hasattr(self, 'audio_visualizer') and hasattr(self, 'volume_indicator'):
-                self.transcription_thread.set_visualizers(self.audio_visualizer, self.volume_indicator)
+                spectrum_analyzer = self.spectrogram_view.analyzer if hasattr(self, 'spectrogram_view') else None
+                self.transcription_thread.set_visualizers(self.audio_visualizer, self.volume_indicator,
+                                                          spectrum_analyzer)
 
             # 连接信号 - 修复参数问题
-            self.transcription_thread.typewriter_delta.connect(self._handle_typewriter_delta)
-            self.transcription_thread.typewriter_completed.connect(self._handle_typewriter_completed)
-            self.transcription_thread.speech_committed.connect(self._handle_speech_committed)
-            self.transcription_thread.error_occurred.connect(self.handle_error)
-            self.transcription_thread.status_update.connect(self._update_status)
-            self.transcription_thread.connection_status.connect(self._update_connection_status)
+            self._connect_transcription_signals(self.transcription_thread)
 
             # 启动转录
             self.transcription_thread.start()
@@ -4468,6 +7319,50 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             logger.error(error_msg)
             self.handle_error(error_msg)
 
+    def _connect_transcription_signals(self, thread):
+        """连接转录线程信号 - 槽函数经过耗时统计包装"""
+        connections = [
+            (thread.typewriter_delta, self._handle_typewriter_delta),
+            (thread.typewriter_completed, self._handle_typewriter_completed),
+            (thread.speech_committed, self._handle_speech_committed),
+            (thread.error_occurred, self.handle_error),
+            (thread.status_update, self._update_status),
+            (thread.connection_status, self._update_connection_status),
+        ]
+        for signal, slot in connections:
+            signal.connect(ui_profiler.wrap(slot.__name__, slot))
+
+    def start_replay(self, trace_path, speed=1.0):
+        """回放会话轨迹 - 无需网络即可复现显示管线"""
+        try:
+            if self.transcription_thread:
+                self.stop_transcription()
+
+            self._update_config()
+            self.total_chars = 0
+            self.session_start_time = time.time()
+
+            self.transcription_thread = SessionReplayWorker(trace_path, self.current_config, speed)
+            self._connect_transcription_signals(self.transcription_thread)
+            self.transcription_thread.finished.connect(self._handle_replay_finished)
+            self.transcription_thread.start()
+
+            self._set_transcription_state(True)
+            self._update_status(self.lang_manager.get_text('status_replaying'), "#FFD700")
+        except Exception as e:
+            error_msg = f"启动会话回放失败: {str(e)}"
+            logger.error(error_msg)
+            self.handle_error(error_msg)
+
+    def _handle_replay_finished(self):
+        """会话回放结束"""
+        try:
+            if isinstance(self.transcription_thread, SessionReplayWorker):
+                self.stop_transcription()
+                self._update_status(self.lang_manager.get_text('status_replay_finished'), "#00FF7F")
+        except Exception as e:
+            logger.error(f"处理回放结束失败: {e}")
+
     def _handle_typewriter_delta(self, item_id, delta_text, full_text, displayed_length, new_chars_count):
         """处理打字机增量信号"""
         try:
@@ -4492,6 +7387,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 self.typewriter_display.finalize_typewriter_item(item_id, final_text, previous_text, should_break_line)
 
             logger.debug(f"✅ 完成 [{item_id}]: '{final_text}' (换行: {should_break_line})")
+            self._request_display_update()
 
             # 保存到历史记录
             self.subtitle_history.append({
@@ -4562,6 +7458,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                     self.typewriter_display.clear_all_typewriter()
                 self.subtitle_history.clear()
                 self.total_chars = 0
+                self._request_display_update()
                 self._update_status(self.lang_manager.get_text('status_cleared'), "#00FF7F")
         except Exception as e:
             logger.error(f"清空显示失败: {e}")
@@ -4571,7 +7468,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
         try:
             has_content = (
                                   hasattr(self, 'typewriter_display') and
-                                  self.typewriter_display.toPlainText().strip()
+                                  self.typewriter_display.full_plain_text().strip()
                           ) or self.subtitle_history
 
             if not has_content:
@@ -4590,7 +7487,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             if file_path:
                 content = ""
                 if hasattr(self, 'typewriter_display'):
-                    content = self.typewriter_display.toPlainText()
+                    content = self.typewriter_display.full_plain_text()
 
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(content)
@@ -4660,15 +7557,65 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             logger.error(error_msg)
             self.handle_error(error_msg)
 
+    def load_audio_folder(self):
+        """选择文件夹进行批量转录"""
+        try:
+            folder = QFileDialog.getExistingDirectory(self, self.lang_manager.get_text('file_select_folder'))
+            if folder:
+                self.start_batch([folder])
+        except Exception as e:
+            logger.error(f"选择批量转录文件夹失败: {e}")
+
+    def start_batch(self, inputs):
+        """启动批量转录 - 转录在后台进行，不占用实时转录"""
+        try:
+            if self.batch_runner is not None:
+                return
+
+            api_key = getattr(self, 'api_key_input', None) and self.api_key_input.text().strip()
+            if not api_key:
+                self._update_status(self.lang_manager.get_text('status_api_key_required'), "#FF4545")
+                return
+
+            self._update_config()
+
+            if hasattr(self, 'progress_bar'):
+                self.progress_bar.setVisible(True)
+                self.progress_bar.setValue(0)
+
+            self.batch_runner = BatchTranscriptionRunner(inputs, self.current_config)
+            if hasattr(self, 'progress_bar'):
+                self.batch_runner.progress_update.connect(self.progress_bar.setValue)
+            self.batch_runner.status_update.connect(self._update_status)
+            self.batch_runner.error_occurred.connect(self.handle_error)
+            self.batch_runner.finished.connect(self._batch_finished)
+            self.batch_runner.start()
+
+            if hasattr(self, 'batch_button'):
+                self.batch_button.setEnabled(False)
+
+        except Exception as e:
+            error_msg = f"批量转录失败: {str(e)}"
+            logger.error(error_msg)
+            self.handle_error(error_msg)
+
+    def _batch_finished(self):
+        """批量转录结束"""
+        try:
+            if hasattr(self, 'progress_bar') and self.file_transcription_worker is None:
+                self.progress_bar.setVisible(False)
+            if hasattr(self, 'batch_button'):
+                self.batch_button.setEnabled(True)
+            self.batch_runner = None
+        except Exception as e:
+            logger.error(f"批量转录完成处理失败: {e}")
+
     def _handle_file_transcription(self, text, timestamp, metadata):
         """处理文件转录结果"""
         try:
             if not hasattr(self, 'typewriter_display'):
                 return
 
-            cursor = self.typewriter_display.textCursor()
-            cursor.movePosition(QTextCursor.End)
-
             # 文件来源显示
             source_text = "文件转录"
             if metadata.get('source') == 'file_large_split':
@@ -4686,8 +7633,8 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             </div><br>
             """
 
-            cursor.insertHtml(file_html)
-            self.typewriter_display._auto_scroll()
+            self.typewriter_display.insert_html_block(file_html, f"📁 [{source_text}] {timestamp}{text}")
+            self._request_display_update()
 
             # 添加到历史记录
             self.subtitle_history.append({
@@ -4717,7 +7664,7 @@ class UltraRealtimeSubtitleApp(QMainWindow):
         try:
             content = ""
             if hasattr(self, 'typewriter_display'):
-                content = self.typewriter_display.toPlainText()
+                content = self.typewriter_display.full_plain_text()
 
             if content.strip():
                 clipboard = QApplication.clipboard()
@@ -4728,6 +7675,39 @@ class UltraRealtimeSubtitleApp(QMainWindow):
         except Exception as e:
             logger.error(f"复制转录内容失败: {e}")
 
+    def _toggle_spectrogram(self, checked):
+        """显示或隐藏频谱图（隐藏时不做频谱计算）"""
+        try:
+            if hasattr(self, 'spectrogram_view'):
+                self.spectrogram_view.setVisible(checked)
+        except Exception as e:
+            logger.error(f"切换频谱图失败: {e}")
+
+    def _toggle_auto_scroll(self, checked):
+        """切换自动滚动"""
+        if hasattr(self, 'typewriter_display'):
+            self.typewriter_display.auto_scroll_enabled = checked
+            if checked:
+                self.typewriter_display._auto_scroll()
+
+    def _search_transcription(self):
+        """在完整转录中查找"""
+        try:
+            if not hasattr(self, 'typewriter_display'):
+                return
+
+            query, ok = QInputDialog.getText(self,
+                                             self.lang_manager.get_text('dialog_search'),
+                                             self.lang_manager.get_text('dialog_search_prompt'))
+            if ok and query:
+                # 查找时停止自动滚动，保持匹配位置可见
+                if hasattr(self, 'auto_scroll_btn'):
+                    self.auto_scroll_btn.setChecked(False)
+                if not self.typewriter_display.find_in_transcript(query):
+                    self._update_status(self.lang_manager.get_text('status_not_found'), "#FFD700")
+        except Exception as e:
+            logger.error(f"查找转录内容失败: {e}")
+
     def _export_transcription(self):
         """导出转录内容"""
         self.save_transcription()
@@ -4787,6 +7767,8 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             for control in controls:
                 control.setEnabled(not transcribing)
 
+            self._request_display_update()
+
         except Exception as e:
             logger.error(f"设置转录状态失败: {e}")
 
@@ -5063,18 +8045,28 @@ class UltraRealtimeSubtitleApp(QMainWindow):
                 self.transcription_thread.stop_transcription()
                 self.transcription_thread.wait(3000)
 
-            # 停止文件转录线程
+            # 停止文件转录线程（取消后不再等待进行中的请求，线程很快退出，必须等它结束再销毁）
             if self.file_transcription_worker:
                 self.file_transcription_worker.cancel()
-                self.file_transcription_worker.wait(3000)
+                self.file_transcription_worker.wait()
+
+            # 停止批量转录，未完成的文件留在任务日志中下次继续
+            if self.batch_runner:
+                self.batch_runner.cancel()
+                self.batch_runner.wait()
 
             # 停止音频可视化
             if hasattr(self, 'audio_visualizer') and self.audio_visualizer:
                 self.audio_visualizer.stop_recording()
 
-            # 停止更新定时器
-            if hasattr(self, 'update_timer'):
-                self.update_timer.stop()
+            # 停止帧调度和卡顿检测
+            if hasattr(self, 'frame_scheduler'):
+                self.frame_scheduler.set_paused(True)
+            ui_profiler.stop()
+
+            # 停止指标端点
+            if self.metrics_server:
+                self.metrics_server.stop()
 
             event.accept()
 
@@ -5083,10 +8075,47 @@ class UltraRealtimeSubtitleApp(QMainWindow):
             event.accept()
 
 
+def run_batch_cli(inputs, journal_path=None, output_dir=None):
+    """无界面批量转录，返回进程退出码（有失败文件时为1）"""
+    app = QCoreApplication(sys.argv[:1])
+    config = ConfigManager().load_config()
+    if not config.get('api_key'):
+        print("❌ 请先在配置文件中设置 api_key")
+        return 1
+
+    runner = BatchTranscriptionRunner(inputs, config, journal_path, output_dir)
+    failed = []
+    runner.status_update.connect(lambda message, color: print(message, flush=True))
+    runner.error_occurred.connect(lambda message: print(f"❌ {message}", flush=True))
+    runner.file_finished.connect(lambda path, status: status == 'failed' and failed.append(path))
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        runner.cancel()
+        print("⏹ 已中断，重新运行相同命令可继续")
+        return 130
+    finally:
+        app.quit()
+    return 1 if failed else 0
+
+
 def main():
     """主函数"""
     try:
-        app = QApplication(sys.argv)
+        parser = argparse.ArgumentParser(description="OpenAI实时语音转文字工具 Pro")
+        parser.add_argument('--replay', metavar='TRACE', help="回放会话轨迹文件 (JSONL)")
+        parser.add_argument('--replay-speed', type=float, default=1.0,
+                            help="回放速度倍数，0 表示尽快回放")
+        parser.add_argument('--batch', nargs='+', metavar='PATH',
+                            help="无界面批量转录文件夹、文件或通配符，可中断后重新运行继续")
+        parser.add_argument('--journal', metavar='DB', help="批量转录任务日志 (SQLite)")
+        parser.add_argument('--output-dir', metavar='DIR', help="批量转录结果目录，默认与音频文件同目录")
+        args, qt_args = parser.parse_known_args()
+
+        if args.batch:
+            sys.exit(run_batch_cli(args.batch, args.journal, args.output_dir))
+
+        app = QApplication([sys.argv[0]] + qt_args)
         app.setApplicationName("OpenAI实时语音转文字工具 Pro")
         app.setApplicationVersion("1.0")
 
@@ -5122,7 +8151,7 @@ def main():
             print("  pip install pyqtgraph")
 
         if not HAS_PYDUB:
-            print("💡 建议安装 pydub 以支持大文件转录:")
+            print("💡 建议安装 pydub 以支持WAV以外格式的大文件转录:")
             print("  pip install pydub")
 
         print("🚀 启动OpenAI实时语音转文字工具 Pro v1.0...")
@@ -5131,6 +8160,9 @@ def main():
         window = UltraRealtimeSubtitleApp()
         window.show()
 
+        if args.replay:
+            QTimer.singleShot(200, lambda: window.start_replay(args.replay, args.replay_speed))
+
         sys.exit(app.exec_())
 
     except Exception as e:
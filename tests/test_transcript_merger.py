@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+main = pytest.importorskip("main")
+
+TranscriptMerger = main.TranscriptMerger
+
+PREVIOUS = ("Thanks everyone for joining. Last week the finance team reviewed the plan for the new office "
+            "and agreed on the budget. The spring numbers came in")
+
+
+def merge(*texts, overlap_ms=3000):
+    return TranscriptMerger(overlap_ms).merge(texts)
+
+
+def test_exact_overlap_is_removed():
+    current = "numbers came in higher than expected, so we will revisit the budget in April."
+    assert merge(PREVIOUS, current) == (
+        PREVIOUS + " higher than expected, so we will revisit the budget in April.")
+
+
+def test_overlap_with_small_wording_differences():
+    current = "the numbers come in higher than expected, so we will revisit the budget in April."
+    merged = merge(PREVIOUS, current)
+    assert merged.startswith(PREVIOUS[:-len("numbers came in")])
+    assert merged.endswith(" higher than expected, so we will revisit the budget in April.")
+    assert merged.count("numbers") == 1
+    assert "\n" not in merged
+
+
+def test_overlap_with_clipped_word_at_both_edges():
+    previous = PREVIOUS + " hig"
+    current = "ers came in higher than expected."
+    assert merge(previous, current) == PREVIOUS + " higher than expected."
+
+
+def test_common_words_that_are_not_overlap_are_kept():
+    previous = ("Last week the finance team reviewed the plan. Marketing then presented three campaign "
+                "drafts and legal raised concerns about the trademark filings in two regions, which pushed")
+    current = "the plan for the rest of the spring."
+    assert merge(previous, current) == previous + "\n" + current
+
+
+def test_shared_phrase_inside_the_window_does_not_cut_text():
+    previous = "Last week the finance team reviewed the plan for the rest of the quarter, then"
+    current = "we met again and reviewed the plan for the rest of the spring."
+    assert merge(previous, current) == previous + "\n" + current
+
+
+def test_chinese_overlap():
+    previous = "今天我们讨论一下明年的预算安排，财务部已经把初步方案发给大家了"
+    current = "把初步方案发给大家了，请各位在周五之前反馈意见。"
+    assert merge(previous, current) == previous + "，请各位在周五之前反馈意见。"
+
+
+def test_no_overlap_configured_joins_with_newline():
+    assert merge("first part", "first part again", overlap_ms=0) == "first part\nfirst part again"
+
+
+def test_window_scales_with_overlap():
+    assert TranscriptMerger(1000).window_chars < TranscriptMerger(5000).window_chars